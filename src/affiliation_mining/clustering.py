@@ -42,6 +42,9 @@ class AffiliationClustering:
         # Group similar affiliations
         clusters = []
         processed = set()
+        lowered = {affiliation: affiliation.lower() for affiliation in affiliations_list}
+        threshold = self.similarity_threshold
+        matcher = SequenceMatcher(None)
         
         for affiliation in affiliations_list:
             if affiliation in processed:
@@ -50,9 +53,18 @@ class AffiliationClustering:
             # Find similar affiliations
             cluster = [affiliation]
             processed.add(affiliation)
+            matcher.set_seq1(lowered[affiliation])
             
             for other in affiliations_list:
-                if other not in processed and self.similarity(affiliation, other) > self.similarity_threshold:
+                if other in processed:
+                    continue
+                
+                # real_quick_ratio and quick_ratio are cheap upper bounds on ratio,
+                # so most dissimilar pairs are rejected without the full comparison
+                matcher.set_seq2(lowered[other])
+                if (matcher.real_quick_ratio() > threshold
+                        and matcher.quick_ratio() > threshold
+                        and matcher.ratio() > threshold):
                     cluster.append(other)
                     processed.add(other)
             
@@ -2,7 +2,7 @@
 
 import re
 from collections import Counter, defaultdict
-from typing import Set, List, Dict, Optional
+from typing import Iterable, Set, List, Dict, Optional
 
 try:
     import spacy
@@ -23,6 +23,12 @@ except ImportError:
 class EnhancedAffiliationMiner:
     """Advanced affiliation mining using spaCy NLP and custom pattern matching."""
     
+    # Texts are fed to spaCy in chunks of at most this many characters
+    max_chunk_length = 1000000
+    
+    # Pipeline components whose output the extraction never reads
+    unused_pipes = ['lemmatizer']
+    
     def __init__(self):
         """Initialize with advanced spaCy features."""
         if spacy is None:
@@ -145,49 +151,90 @@ class EnhancedAffiliationMiner:
             return set()
         
         nlp = self.nlp_models[language]
-        matcher = self.matchers[language]
-        
         affiliations = set()
         
         # Process text in chunks to handle large documents
-        max_length = 1000000
-        text_chunks = [text[i:i+max_length] for i in range(0, len(text), max_length)]
-        
-        for chunk in text_chunks:
+        for chunk in self._text_chunks(text):
             try:
                 doc = nlp(chunk)
-                
-                # Method 1: Standard NER for organizations
-                for ent in doc.ents:
-                    if ent.label_ == "ORG":
-                        org_text = ent.text.strip()
-                        if self.is_relevant_affiliation(org_text):
-                            affiliations.add(org_text)
-                
-                # Method 2: Custom pattern matching
-                matches = matcher(doc)
-                for match_id, start, end in matches:
-                    span = doc[start:end]
-                    affiliation_text = span.text.strip()
-                    if len(affiliation_text) > 5:
-                        affiliations.add(affiliation_text)
-                
-                # Method 3: Context-based extraction
-                # Look for sentences containing institutional indicators
-                for sent in doc.sents:
-                    sent_text = sent.text.strip()
-                    if self.contains_institutional_indicators(sent_text, language):
-                        # Extract the institutional part
-                        extracted = self.extract_institutional_part(sent_text, language)
-                        if extracted:
-                            affiliations.add(extracted)
-                            
+                self._extract_from_doc(doc, language, affiliations)
             except Exception as e:
                 print(f"⚠️ Error processing chunk: {e}")
                 continue
         
         return affiliations
     
+    def batch_extract(self, texts: Iterable[str], batch_size: int = 64) -> List[Set[str]]:
+        """
+        Extract affiliations from many texts, batching them through spaCy.
+        
+        Equivalent to calling extract_affiliations_advanced_nlp on each text, but
+        texts of the same language go through a single nlp.pipe call so the
+        per-document pipeline overhead is amortized.
+        
+        Args:
+            texts: Texts to process
+            batch_size: Number of texts spaCy processes per batch
+            
+        Returns:
+            list: One set of affiliations per input text, in input order
+        """
+        results = []
+        chunks_by_language = defaultdict(list)
+        
+        for index, text in enumerate(texts):
+            results.append(set())
+            language = self.detect_language_advanced(text)
+            if language not in self.nlp_models:
+                print(f"⚠️ No model available for language: {language}")
+                continue
+            chunks_by_language[language].extend(
+                (chunk, index) for chunk in self._text_chunks(text)
+            )
+        
+        for language, chunks in chunks_by_language.items():
+            docs = self.nlp_models[language].pipe(
+                chunks, as_tuples=True, batch_size=batch_size, disable=self.unused_pipes
+            )
+            for doc, index in docs:
+                try:
+                    self._extract_from_doc(doc, language, results[index])
+                except Exception as e:
+                    print(f"⚠️ Error processing chunk: {e}")
+        
+        return results
+    
+    def _text_chunks(self, text: str) -> List[str]:
+        """Split text into pieces spaCy can process."""
+        return [text[i:i+self.max_chunk_length] for i in range(0, len(text), self.max_chunk_length)]
+    
+    def _extract_from_doc(self, doc, language: str, affiliations: Set[str]) -> None:
+        """Add the affiliations found in a processed spaCy doc to the given set."""
+        # Method 1: Standard NER for organizations
+        for ent in doc.ents:
+            if ent.label_ == "ORG":
+                org_text = ent.text.strip()
+                if self.is_relevant_affiliation(org_text):
+                    affiliations.add(org_text)
+        
+        # Method 2: Custom pattern matching
+        matches = self.matchers[language](doc)
+        for match_id, start, end in matches:
+            span = doc[start:end]
+            affiliation_text = span.text.strip()
+            if len(affiliation_text) > 5:
+                affiliations.add(affiliation_text)
+        
+        # Method 3: Context-based extraction
+        # Look for sentences containing institutional indicators
+        for sent in doc.sents:
+            sent_text = sent.text.strip()
+            if self.contains_institutional_indicators(sent_text, language):
+                # Extract the institutional part
+                extracted = self.extract_institutional_part(sent_text, language)
+                if extracted:
+                    affiliations.add(extracted)
+    
     def is_relevant_affiliation(self, org_text: str) -> bool:
         """Check if organization text is relevant to our search."""
         relevant_keywords = [
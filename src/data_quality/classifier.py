@@ -1,5 +1,6 @@
 """Publication classification and quality analysis."""
 
+import re
 from typing import Dict, Any, List
 from collections import Counter
 
@@ -17,6 +18,13 @@ class PublicationClassifier:
             'Methodology': ['method', 'technique', 'protocol', 'approach', 'procedure'],
             'Research Article': []  # Default category
         }
+        
+        # One compiled alternation per type, checked in the order above
+        self._type_patterns = [
+            (pub_type, re.compile('|'.join(re.escape(kw) for kw in keywords)))
+            for pub_type, keywords in self.classification_keywords.items()
+            if keywords
+        ]
     
     def classify_publication_type(self, title: str, abstract: str) -> str:
         """
@@ -29,14 +37,11 @@ class PublicationClassifier:
         Returns:
             str: Classified publication type
         """
-        text = (title + " " + abstract).lower()
+        text = f"{title or ''} {abstract or ''}".lower()
         
-        # Check each category
-        for pub_type, keywords in self.classification_keywords.items():
-            if pub_type == 'Research Article':
-                continue  # Skip default category
-            
-            if any(kw in text for kw in keywords):
+        # Check each category (the default category has no pattern)
+        for pub_type, pattern in self._type_patterns:
+            if pattern.search(text):
                 return pub_type
         
         # Default to Research Article
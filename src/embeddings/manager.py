@@ -2,15 +2,23 @@
 Embeddings generation and similarity search
 """
 
+import hashlib
 import numpy as np
 import pandas as pd
+from collections import Counter, OrderedDict
+from itertools import chain
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 import pickle
 from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.decomposition import PCA
 from sentence_transformers import SentenceTransformer
 
+try:
+    import faiss  # Optional, faster in-memory similarity search
+except ImportError:
+    faiss = None
+
 # Robust imports for both package and notebook usage
 try:
     from ..utils.logger import get_logger
@@ -21,6 +29,14 @@ except ImportError:
     from utils.config import load_config
 
 
+# Common words skipped when extracting research keywords from titles
+_STOP_WORDS = frozenset([
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was',
+    'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new',
+    'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'she', 'use', 'way', 'will', 'with'
+])
+
+
 class EmbeddingsManager:
     """Manage embeddings for articles and similarity search"""
     
@@ -28,9 +44,22 @@ class EmbeddingsManager:
         self.config = config or load_config()
         self.logger = get_logger(__name__)
         self.model_name = self.config['embeddings']['model_name']
+        self.batch_size = self.config['embeddings'].get('batch_size', 64)
         self.model = None
         self.ifc_embeddings = None
         self.ifc_articles = None
+        self.ifc_index = None
+        self._ifc_mean_direction = None
+        
+        # Large corpora are prefiltered by Hamming distance on sign bits (needs faiss)
+        self.binary_prefilter_min_articles = self.config['embeddings'].get('binary_prefilter_min_articles', 50000)
+        self.binary_rerank_candidates = self.config['embeddings'].get('binary_rerank_candidates', 50)
+        self.ifc_binary_index = None
+        self._ifc_normalized = None
+        
+        # LRU cache of query embeddings keyed by SHA1 of the text
+        self.query_cache_size = self.config['embeddings'].get('query_cache_size', 4096)
+        self._query_cache = OrderedDict()
         
     def load_model(self):
         """Load the sentence transformer model"""
@@ -51,10 +80,93 @@ class EmbeddingsManager:
         self.load_model()
         
         self.logger.info(f"Generating embeddings for {len(texts)} texts")
-        embeddings = self.model.encode(texts, show_progress_bar=True)
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=len(texts) > self.batch_size
+        )
+        
+        return embeddings
+    
+    @staticmethod
+    def _l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+        """Scale each embedding row to unit length (zero rows are left as-is)"""
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+    
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        """Hash a text so it can be used as a cache key"""
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+    
+    def _generate_query_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for query texts, reusing cached rows for repeated texts
+        
+        Only texts that miss the cache are sent to the model (in a single batch).
+        
+        Args:
+            texts: List of text strings
+            
+        Returns:
+            Numpy array of embeddings, in the same order as ``texts``
+        """
+        hashes = [self._text_hash(text) for text in texts]
+        
+        # Batch-encode only the unique texts not seen before
+        misses = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash in self._query_cache:
+                self._query_cache.move_to_end(text_hash)
+            elif text_hash not in misses:
+                misses[text_hash] = text
+        
+        self.logger.info(f"Query embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+        
+        if misses:
+            new_embeddings = self.generate_embeddings(list(misses.values()))
+            for text_hash, embedding in zip(misses, new_embeddings):
+                self._query_cache[text_hash] = embedding
+        
+        embeddings = np.array([self._query_cache[text_hash] for text_hash in hashes])
+        
+        # Evict least recently used entries
+        while len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
         
         return embeddings
     
+    @staticmethod
+    def _prepare_texts(articles: List[Dict]) -> Tuple[List[str], List[Dict]]:
+        """
+        Combine title and abstract of each article into the text to embed
+        
+        Args:
+            articles: List of article dictionaries
+            
+        Returns:
+            Tuple of (texts, articles) keeping only articles with a title or abstract
+        """
+        if not articles:
+            return [], []
+        
+        df = pd.DataFrame(articles, columns=['title', 'abstract'])
+        titles = df['title'].fillna('').astype(str)
+        abstracts = df['abstract'].fillna('').astype(str)
+        
+        has_title = titles.str.len() > 0
+        has_abstract = abstracts.str.len() > 0
+        
+        # "title. abstract" when both exist, otherwise whichever part is present
+        combined = titles.str.cat(abstracts, sep=". ")
+        combined = combined.where(has_title & has_abstract, titles + abstracts)
+        
+        mask = (has_title | has_abstract).to_numpy()
+        texts = combined[mask].tolist()
+        valid_articles = [articles[i] for i in np.flatnonzero(mask)]
+        return texts, valid_articles
+    
     def process_ifc_articles(self, articles_data: List[Dict]) -> None:
         """
         Process IFC articles and generate embeddings
@@ -65,28 +177,72 @@ class EmbeddingsManager:
         self.logger.info(f"Processing {len(articles_data)} IFC articles")
         
         # Prepare texts for embedding (title + abstract)
-        texts = []
-        processed_articles = []
-        
-        for article in articles_data:
-            # Combine title and abstract for embedding
-            text_parts = []
-            if article.get('title'):
-                text_parts.append(article['title'])
-            if article.get('abstract'):
-                text_parts.append(article['abstract'])
-            
-            if text_parts:
-                combined_text = ". ".join(text_parts)
-                texts.append(combined_text)
-                processed_articles.append(article)
+        texts, processed_articles = self._prepare_texts(articles_data)
+        
+        # Generate embeddings once per distinct text (re-scrapes and reprints repeat)
+        unique_rows = {}
+        row_map = [unique_rows.setdefault(text, len(unique_rows)) for text in texts]
+        if len(unique_rows) < len(texts):
+            self.logger.info(f"Skipping {len(texts) - len(unique_rows)} duplicate texts")
         
-        # Generate embeddings
-        self.ifc_embeddings = self.generate_embeddings(texts)
+        unique_embeddings = self.generate_embeddings(list(unique_rows))
+        self.ifc_embeddings = unique_embeddings[row_map] if len(unique_rows) < len(texts) else unique_embeddings
         self.ifc_articles = processed_articles
+        self._build_similarity_index()
         
         self.logger.info(f"Generated embeddings for {len(processed_articles)} IFC articles")
     
+    def _build_similarity_index(self) -> None:
+        """
+        Build the inner-product index over the L2-normalized IFC embeddings
+        
+        Uses a FAISS IndexFlatIP when faiss is installed and a plain numpy
+        matrix otherwise. The mean direction is kept so mean cosine similarity
+        is a single dot product per query.
+        """
+        normalized = np.ascontiguousarray(self._l2_normalize(self.ifc_embeddings), dtype=np.float32)
+        self._ifc_mean_direction = normalized.mean(axis=0)
+        
+        if faiss is not None:
+            index = faiss.IndexFlatIP(normalized.shape[1])
+            index.add(normalized)
+            self.ifc_index = index
+        else:
+            self.ifc_index = normalized
+        
+        # For large corpora, also index the 1-bit sign codes; the exact float rows
+        # are kept for reranking the Hamming shortlist
+        self.ifc_binary_index = None
+        self._ifc_normalized = None
+        if (faiss is not None and normalized.shape[1] % 8 == 0
+                and len(normalized) >= self.binary_prefilter_min_articles):
+            binary_index = faiss.IndexBinaryFlat(normalized.shape[1])
+            binary_index.add(np.packbits(normalized > 0, axis=1))
+            self.ifc_binary_index = binary_index
+            self._ifc_normalized = normalized
+    
+    def _max_similarities(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Highest cosine similarity of each normalized query to any IFC article
+        
+        Args:
+            queries: L2-normalized float32 query embeddings
+            
+        Returns:
+            Array with one maximum similarity per query
+        """
+        if self.ifc_binary_index is not None:
+            # Shortlist by Hamming distance, then rerank the shortlist exactly
+            k = min(self.binary_rerank_candidates, len(self._ifc_normalized))
+            _, candidates = self.ifc_binary_index.search(np.packbits(queries > 0, axis=1), k)
+            return np.einsum('md,mkd->mk', queries, self._ifc_normalized[candidates]).max(axis=1)
+        
+        if faiss is not None:
+            max_similarities, _ = self.ifc_index.search(queries, 1)
+            return max_similarities[:, 0]
+        
+        return (queries @ self.ifc_index.T).max(axis=1)
+    
     def analyze_research_themes(self, n_clusters: int = None) -> Dict:
         """
         Analyze research themes using clustering
@@ -100,13 +256,26 @@ class EmbeddingsManager:
         if self.ifc_embeddings is None:
             raise ValueError("No IFC embeddings available. Run process_ifc_articles first.")
         
-        n_clusters = n_clusters or self.config['embeddings']['clustering']['n_clusters']
+        clustering_config = self.config['embeddings']['clustering']
+        n_clusters = n_clusters or clustering_config['n_clusters']
+        
+        # Small corpora cannot be split into more clusters than articles
+        n_clusters = min(n_clusters, len(self.ifc_articles))
         
         self.logger.info(f"Analyzing research themes with {n_clusters} clusters")
         
-        # Perform clustering
+        # Perform clustering on unit-length rows so distances follow cosine geometry
+        normalized = self._l2_normalize(self.ifc_embeddings)
+        
+        # Reduce dimensionality first for large corpora; KMeans cost scales with dimensions
+        pca_components = clustering_config.get('pca_components', 50)
+        if len(normalized) > clustering_config.get('pca_min_articles', 500) and normalized.shape[1] > pca_components:
+            features = PCA(n_components=pca_components, random_state=42).fit_transform(normalized)
+        else:
+            features = normalized
+        
         kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        cluster_labels = kmeans.fit_predict(self.ifc_embeddings)
+        cluster_labels = kmeans.fit_predict(features)
         
         # Analyze clusters
         clusters = {}
@@ -122,7 +291,7 @@ class EmbeddingsManager:
                 'size': len(cluster_articles),
                 'articles': cluster_articles,
                 'sample_titles': cluster_titles[:5],  # First 5 titles as examples
-                'centroid': kmeans.cluster_centers_[i]
+                'centroid': normalized[cluster_mask].mean(axis=0)
             }
         
         # Generate theme keywords for each cluster
@@ -153,53 +322,45 @@ class EmbeddingsManager:
         self.logger.info(f"Finding similar articles among {len(query_articles)} candidates")
         
         # Prepare query texts
-        query_texts = []
-        valid_articles = []
-        
-        for article in query_articles:
-            text_parts = []
-            if article.get('title'):
-                text_parts.append(article['title'])
-            if article.get('abstract'):
-                text_parts.append(article['abstract'])
-            
-            if text_parts:
-                combined_text = ". ".join(text_parts)
-                query_texts.append(combined_text)
-                valid_articles.append(article)
+        query_texts, valid_articles = self._prepare_texts(query_articles)
         
         if not query_texts:
             self.logger.warning("No valid query articles found")
             return []
         
         # Generate embeddings for query articles
-        query_embeddings = self.generate_embeddings(query_texts)
-        
-        # Calculate similarity scores
-        similarity_scores = []
-        
-        for i, query_embedding in enumerate(query_embeddings):
-            # Calculate maximum similarity to any IFC article
-            similarities = cosine_similarity(
-                query_embedding.reshape(1, -1), 
-                self.ifc_embeddings
-            )[0]
-            max_similarity = np.max(similarities)
-            mean_similarity = np.mean(similarities)
-            
-            # Store article with similarity scores
-            article_with_score = valid_articles[i].copy()
-            article_with_score['max_similarity'] = float(max_similarity)
-            article_with_score['mean_similarity'] = float(mean_similarity)
-            article_with_score['combined_score'] = float(0.7 * max_similarity + 0.3 * mean_similarity)
-            
-            similarity_scores.append(article_with_score)
+        query_embeddings = self._generate_query_embeddings(query_texts)
+        
+        # Calculate maximum and mean cosine similarity to the IFC articles
+        if self.ifc_index is None:
+            self._build_similarity_index()
+        
+        queries = np.ascontiguousarray(self._l2_normalize(query_embeddings), dtype=np.float32)
+        max_similarities = self._max_similarities(queries)
+        mean_similarities = queries @ self._ifc_mean_direction
         
-        # Sort by combined similarity score
-        similarity_scores.sort(key=lambda x: x['combined_score'], reverse=True)
+        combined_scores = 0.7 * max_similarities + 0.3 * mean_similarities
+        
+        # Select the top-k candidates without sorting the full score array
+        top_k = min(top_k, len(valid_articles))
+        if top_k <= 0:
+            return []
+        top_indices = np.argpartition(-combined_scores, top_k - 1)[:top_k]
+        top_indices = top_indices[np.argsort(-combined_scores[top_indices], kind='stable')]
+        
+        # Only the selected articles are copied and annotated with their scores
+        similarity_scores = [
+            {
+                **valid_articles[j],
+                'max_similarity': float(max_similarities[j]),
+                'mean_similarity': float(mean_similarities[j]),
+                'combined_score': float(combined_scores[j])
+            }
+            for j in top_indices
+        ]
         
         self.logger.info(f"Found top {top_k} similar articles")
-        return similarity_scores[:top_k]
+        return similarity_scores
     
     def save_embeddings(self, output_dir: str = None) -> None:
         """Save embeddings and processed articles"""
@@ -239,6 +400,8 @@ class EmbeddingsManager:
             with open(articles_path, 'rb') as f:
                 self.ifc_articles = pickle.load(f)
             
+            self._build_similarity_index()
+            
             self.logger.info(f"Loaded embeddings from {input_dir}")
         else:
             self.logger.warning(f"Embeddings not found in {input_dir}")
@@ -253,27 +416,38 @@ class EmbeddingsManager:
         Returns:
             List of research keywords for PubMed search
         """
-        keywords = []
-        
         # For now, extract from cluster sample titles
         # In a more sophisticated implementation, you might use TF-IDF or other methods
-        for cluster_id, cluster_data in theme_analysis['clusters'].items():
-            titles = cluster_data['sample_titles']
+        titles = chain.from_iterable(
+            cluster_data['sample_titles'] for cluster_data in theme_analysis['clusters'].values()
+        )
+        return self._keywords_from_titles(titles)
+    
+    def extract_title_keywords(self, articles: List[Dict]) -> List[str]:
+        """
+        Extract research terms directly from article titles
+        
+        Cheap alternative to extract_research_keywords that does not need
+        the embeddings or clustering to have run first.
+        
+        Args:
+            articles: Article dictionaries with a 'title' field
             
-            # Simple keyword extraction from titles
-            for title in titles:
-                if title:
-                    # Split and filter common words
-                    words = title.lower().split()
-                    filtered_words = [
-                        word.strip('.,!?;:()[]') for word in words 
-                        if len(word) > 3 and word not in ['the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'she', 'use', 'way', 'will', 'with']
-                    ]
-                    keywords.extend(filtered_words)
+        Returns:
+            List of research keywords for PubMed search
+        """
+        return self._keywords_from_titles(article.get('title') for article in articles)
+    
+    def _keywords_from_titles(self, titles) -> List[str]:
+        """Count the most common non-stop-words across titles"""
+        # Simple keyword extraction from titles: split and filter common words
+        words = chain.from_iterable(title.lower().split() for title in titles if title)
+        keyword_counts = Counter(
+            word.strip('.,!?;:()[]') for word in words
+            if len(word) > 3 and word not in _STOP_WORDS
+        )
         
         # Get most common keywords
-        from collections import Counter
-        keyword_counts = Counter(keywords)
         top_keywords = [word for word, count in keyword_counts.most_common(20)]
         
         self.logger.info(f"Extracted {len(top_keywords)} research keywords")
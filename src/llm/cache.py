@@ -0,0 +1,149 @@
+"""
+Response cache for LLM providers
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Robust imports for both package and notebook usage
+try:
+    from ..utils.logger import get_logger
+    from ..utils.config import get_data_dir
+    from .script_generator import LLMProvider
+except ImportError:
+    # Fallback for direct execution or notebook usage
+    from utils.logger import get_logger
+    from utils.config import get_data_dir
+    from llm.script_generator import LLMProvider
+
+
+class CachingLLMProvider(LLMProvider):
+    """
+    Wrap an LLM provider with an on-disk response cache
+
+    Responses are looked up by an exact hash of the model, generation
+    parameters and prompt. When ``semantic_threshold`` is set, a miss falls
+    back to the cached prompt with the most similar embedding, served if its
+    cosine similarity reaches the threshold.
+    """
+
+    def __init__(self, delegate: LLMProvider, cache_dir: str = None,
+                 semantic_threshold: Optional[float] = None,
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        self.delegate = delegate
+        self.logger = get_logger(__name__)
+        self.semantic_threshold = semantic_threshold
+        self.embedding_model_name = embedding_model
+        self._embedding_model = None
+
+        cache_dir = Path(cache_dir) if cache_dir else get_data_dir() / "cache" / "llm"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.db = sqlite3.connect(str(cache_dir / "responses.db"))
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, params TEXT, prompt TEXT, response TEXT, embedding BLOB)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_params ON responses (params)")
+        self.db.commit()
+
+    def _params_key(self, kwargs: Dict) -> str:
+        """Serialize the settings that change the response for a given prompt"""
+        return json.dumps({
+            'provider': type(self.delegate).__name__,
+            'model': getattr(self.delegate, 'model', None),
+            'temperature': kwargs.get('temperature'),
+            'max_tokens': kwargs.get('max_tokens')
+        }, sort_keys=True)
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        """Embed a prompt as a unit-length float32 vector"""
+        if self._embedding_model is None:
+            from sentence_transformers import SentenceTransformer
+            self._embedding_model = SentenceTransformer(self.embedding_model_name)
+
+        embedding = self._embedding_model.encode([prompt], normalize_embeddings=True)[0]
+        return np.asarray(embedding, dtype=np.float32)
+
+    def _find_similar_response(self, params: str, embedding: np.ndarray) -> Optional[str]:
+        """Return the cached response of the most similar prompt above the threshold"""
+        rows = self.db.execute(
+            "SELECT embedding, response FROM responses WHERE params = ? AND embedding IS NOT NULL",
+            (params,)
+        ).fetchall()
+        if not rows:
+            return None
+
+        matrix = np.frombuffer(b"".join(row[0] for row in rows), dtype=np.float32)
+        similarities = matrix.reshape(len(rows), -1) @ embedding
+        best = int(np.argmax(similarities))
+
+        if similarities[best] >= self.semantic_threshold:
+            self.logger.info(f"LLM cache semantic hit (similarity {similarities[best]:.3f})")
+            return rows[best][1]
+        return None
+
+    def _lookup(self, prompt: str, kwargs: Dict) -> Tuple[Optional[str], str, str, Optional[np.ndarray]]:
+        """Return (cached response or None, key, params, prompt embedding) for a prompt"""
+        params = self._params_key(kwargs)
+        key = hashlib.sha256((params + prompt).encode('utf-8')).hexdigest()
+
+        row = self.db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self.logger.info("LLM cache hit")
+            return row[0], key, params, None
+
+        embedding = None
+        if self.semantic_threshold is not None:
+            embedding = self._embed(prompt)
+            cached = self._find_similar_response(params, embedding)
+            if cached is not None:
+                return cached, key, params, embedding
+
+        return None, key, params, embedding
+
+    def _store(self, key: str, params: str, prompt: str, response: str,
+               embedding: Optional[np.ndarray]) -> None:
+        """Add a generated response to the cache"""
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses (key, params, prompt, response, embedding) VALUES (?, ?, ?, ?, ?)",
+            (key, params, prompt, response, embedding.tobytes() if embedding is not None else None)
+        )
+        self.db.commit()
+
+    async def generate_response(self, prompt: str, **kwargs) -> str:
+        """Serve the response from the cache, or generate and store it"""
+        cached, key, params, embedding = self._lookup(prompt, kwargs)
+        if cached is not None:
+            return cached
+
+        response = await self.delegate.generate_response(prompt, **kwargs)
+        self._store(key, params, prompt, response, embedding)
+        return response
+
+    async def generate_responses(self, requests: List[Tuple[str, Dict]]) -> List[str]:
+        """Serve cached responses and generate the rest in one delegate call"""
+        responses = []
+        misses = []
+        for i, (prompt, kwargs) in enumerate(requests):
+            cached, key, params, embedding = self._lookup(prompt, kwargs)
+            responses.append(cached)
+            if cached is None:
+                misses.append((i, key, params, embedding))
+
+        if misses:
+            generated = await self.delegate.generate_responses([requests[i] for i, *_ in misses])
+            for (i, key, params, embedding), response in zip(misses, generated):
+                self._store(key, params, requests[i][0], response, embedding)
+                responses[i] = response
+
+        return responses
+
+    async def aclose(self) -> None:
+        """Release the wrapped provider's connections"""
+        await self.delegate.aclose()
@@ -3,18 +3,73 @@ LLM integration for podcast script generation
 """
 
 import asyncio
-from typing import List, Dict, Optional
+import hashlib
+import io
+import random
+import re
+from datetime import date, datetime
+from itertools import chain, islice
+from pathlib import Path
+from typing import Iterator, List, Dict, Optional, Tuple
 from abc import ABC, abstractmethod
 import json
 
 # Robust imports for both package and notebook usage
 try:
     from ..utils.logger import get_logger
-    from ..utils.config import load_config
+    from ..utils.config import load_config, get_output_dir
 except ImportError:
     # Fallback for direct execution or notebook usage
     from utils.logger import get_logger
-    from utils.config import load_config
+    from utils.config import load_config, get_output_dir
+
+
+# Sentences (split on '.') that contain a conclusion-like phrase
+_FINDINGS_RE = re.compile(
+    r'(?<![^.])[^.]*?(?:found|showed|demonstrated|revealed|concluded|results indicate)[^.]*',
+    re.IGNORECASE
+)
+
+# HTTP statuses worth retrying: timeouts, rate limits and transient server errors
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+_RETRYABLE_ERRORS = {'APIConnectionError', 'APITimeoutError'}
+
+
+def _retry_delay(error: Exception, attempt: int, max_delay: float) -> Optional[float]:
+    """
+    Seconds to wait before retrying a failed API call, or None if it should not be retried
+    
+    Uses the server's Retry-After header when present, otherwise full-jitter
+    exponential backoff capped at ``max_delay``.
+    """
+    status = getattr(error, 'status_code', None)
+    if status not in _RETRYABLE_STATUS and type(error).__name__ not in _RETRYABLE_ERRORS:
+        return None
+    
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), max_delay)
+        except ValueError:
+            pass
+    
+    return random.uniform(0, min(max_delay, 2 ** attempt))
+
+# Fixed instructions appended to the configured podcast prompt
+_PODCAST_PROMPT_SUFFIX = """
+
+Additional Instructions:
+- Focus on the most impactful and interconnected findings
+- Create smooth transitions between different topics
+- Include brief explanations of complex scientific terms
+- Maintain an engaging, conversational tone
+- Structure: Opening hook (30 seconds), Main content (4 minutes), Closing (30 seconds)
+- Target audience: Educated general public with interest in science
+- Mention that this is generated from recent research relevant to IFC-UNAM's research areas
+
+Please generate a complete podcast script with clear sections and timing cues.
+"""
 
 
 class LLMProvider(ABC):
@@ -24,6 +79,46 @@ class LLMProvider(ABC):
     async def generate_response(self, prompt: str, **kwargs) -> str:
         """Generate response from LLM"""
         pass
+    
+    async def generate_responses(self, requests: List[Tuple[str, Dict]]) -> List[str]:
+        """
+        Generate responses for several independent prompts
+        
+        Args:
+            requests: (prompt, kwargs) pairs; kwargs as for generate_response
+            
+        Returns:
+            Responses in the same order as ``requests``
+        """
+        return list(await asyncio.gather(*(
+            self.generate_response(prompt, **kwargs) for prompt, kwargs in requests
+        )))
+    
+    async def aclose(self) -> None:
+        """Release any network resources held by the provider"""
+        pass
+    
+    async def _with_retries(self, request, max_attempts: int = 6, max_delay: float = 60.0):
+        """
+        Await ``request()`` and retry rate-limited or transient failures with backoff
+        
+        Args:
+            request: Zero-argument callable returning the API call coroutine
+            max_attempts: Total attempts before the last error is re-raised
+            max_delay: Upper bound in seconds for a single wait
+        """
+        for attempt in range(max_attempts):
+            try:
+                return await request()
+            except Exception as e:
+                delay = _retry_delay(e, attempt, max_delay)
+                if delay is None or attempt == max_attempts - 1:
+                    raise
+                self.logger.warning(
+                    f"Retryable API error ({type(e).__name__}), attempt {attempt + 1}/{max_attempts}; "
+                    f"retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
 
 
 class OpenAIProvider(LLMProvider):
@@ -34,24 +129,150 @@ class OpenAIProvider(LLMProvider):
         self.model = model
         self.logger = get_logger(__name__)
         
+        # One client per provider so every call reuses the same connection pool;
+        # SDK retries are off so _with_retries is the only retry policy
+        import openai
+        self.client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        
     async def generate_response(self, prompt: str, **kwargs) -> str:
         """Generate response using OpenAI API"""
         try:
-            import openai
-            client = openai.AsyncOpenAI(api_key=self.api_key)
+            # Routes prompts sharing a prefix to the same server-side prompt cache
+            extra_body = {}
+            if kwargs.get('prompt_cache_key'):
+                extra_body['prompt_cache_key'] = kwargs['prompt_cache_key']
             
-            response = await client.chat.completions.create(
+            response = await self._with_retries(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=kwargs.get('temperature', 0.7),
-                max_tokens=kwargs.get('max_tokens', 4000)
-            )
+                max_tokens=kwargs.get('max_tokens', 4000),
+                extra_body=extra_body or None
+            ))
             
             return response.choices[0].message.content
             
         except Exception as e:
             self.logger.error(f"OpenAI API error: {str(e)}")
             raise
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool"""
+        await self.client.close()
+
+
+class OpenAIBatchProvider(OpenAIProvider):
+    """
+    OpenAI provider that submits prompts through the Batch API
+    
+    Batch requests are billed at a discount but can take minutes to hours to
+    complete, so this provider is only suited to runs where latency is not urgent.
+    """
+    
+    def __init__(self, api_key: str, model: str = "gpt-4", poll_interval: float = 30.0):
+        super().__init__(api_key, model)
+        self.poll_interval = poll_interval
+    
+    async def generate_response(self, prompt: str, **kwargs) -> str:
+        """Generate a single response through the Batch API"""
+        responses = await self.generate_batch_responses([prompt], **kwargs)
+        return responses[0]
+    
+    async def generate_responses(self, requests: List[Tuple[str, Dict]]) -> List[str]:
+        """Generate responses for several prompts in a single batch job"""
+        return await self.generate_batch_responses(
+            [prompt for prompt, _ in requests],
+            per_prompt_kwargs=[kwargs for _, kwargs in requests]
+        )
+    
+    async def generate_batch_responses(
+        self, 
+        prompts: List[str], 
+        per_prompt_kwargs: Optional[List[Dict]] = None, 
+        **kwargs
+    ) -> List[str]:
+        """
+        Submit several prompts as one batch job and wait for the results
+        
+        Args:
+            prompts: Prompts to send, one chat completion each
+            per_prompt_kwargs: Optional settings (temperature, max_tokens) per
+                prompt, overriding ``kwargs`` for that prompt
+            
+        Returns:
+            Responses in the same order as ``prompts``
+        """
+        try:
+            client = self.client
+            
+            # One JSONL line per prompt; custom_id keeps track of the original order
+            lines = []
+            for i, prompt in enumerate(prompts):
+                prompt_kwargs = {**kwargs, **(per_prompt_kwargs[i] if per_prompt_kwargs else {})}
+                lines.append(json.dumps({
+                    "custom_id": f"request-{i}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "temperature": prompt_kwargs.get('temperature', 0.7),
+                        "max_tokens": prompt_kwargs.get('max_tokens', 4000)
+                    }
+                }))
+            
+            batch_input = io.BytesIO("\n".join(lines).encode('utf-8'))
+            input_file = await client.files.create(file=("batch_input.jsonl", batch_input), purpose="batch")
+            batch = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            self.logger.info(f"Submitted OpenAI batch {batch.id} with {len(prompts)} prompts")
+            
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                await asyncio.sleep(self.poll_interval)
+                batch = await client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed":
+                raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+            
+            responses = {}
+            failed = {}
+            if batch.output_file_id:
+                output = await client.files.content(batch.output_file_id)
+                for line in output.text.splitlines():
+                    if not line.strip():
+                        continue
+                    result = json.loads(line)
+                    response = result.get('response')
+                    if result.get('error') or not response or response.get('status_code') != 200:
+                        failed[result['custom_id']] = result.get('error') or (response or {}).get('body')
+                        continue
+                    responses[result['custom_id']] = response['body']['choices'][0]['message']['content']
+            
+            # Requests that failed outright are only listed in the error file
+            if batch.error_file_id:
+                errors = await client.files.content(batch.error_file_id)
+                for line in errors.text.splitlines():
+                    if line.strip():
+                        result = json.loads(line)
+                        failed.setdefault(
+                            result['custom_id'],
+                            result.get('error') or (result.get('response') or {}).get('body')
+                        )
+            
+            custom_ids = [f"request-{i}" for i in range(len(prompts))]
+            missing = [custom_id for custom_id in custom_ids if custom_id not in responses]
+            if missing:
+                details = "; ".join(f"{custom_id}: {failed.get(custom_id, 'no result')}" for custom_id in missing)
+                raise RuntimeError(f"OpenAI batch {batch.id} has failed requests: {details}")
+            
+            return [responses[custom_id] for custom_id in custom_ids]
+            
+        except Exception as e:
+            self.logger.error(f"OpenAI Batch API error: {str(e)}")
+            raise
 
 
 class AnthropicProvider(LLMProvider):
@@ -62,24 +283,39 @@ class AnthropicProvider(LLMProvider):
         self.model = model
         self.logger = get_logger(__name__)
         
+        # One client per provider so every call reuses the same connection pool;
+        # SDK retries are off so _with_retries is the only retry policy
+        import anthropic
+        self.client = anthropic.AsyncAnthropic(api_key=self.api_key, max_retries=0)
+        
     async def generate_response(self, prompt: str, **kwargs) -> str:
         """Generate response using Anthropic API"""
         try:
-            import anthropic
-            client = anthropic.AsyncAnthropic(api_key=self.api_key)
+            # Mark a shared prompt prefix as cacheable so sibling calls reuse it
+            content = prompt
+            cache_prefix = kwargs.get('cache_prefix')
+            if cache_prefix and prompt.startswith(cache_prefix):
+                content = [
+                    {"type": "text", "text": cache_prefix, "cache_control": {"type": "ephemeral"}},
+                    {"type": "text", "text": prompt[len(cache_prefix):]}
+                ]
             
-            response = await client.messages.create(
+            response = await self._with_retries(lambda: self.client.messages.create(
                 model=self.model,
                 max_tokens=kwargs.get('max_tokens', 4000),
                 temperature=kwargs.get('temperature', 0.7),
-                messages=[{"role": "user", "content": prompt}]
-            )
+                messages=[{"role": "user", "content": content}]
+            ))
             
             return response.content[0].text
             
         except Exception as e:
             self.logger.error(f"Anthropic API error: {str(e)}")
             raise
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool"""
+        await self.client.close()
 
 
 class GoogleProvider(LLMProvider):
@@ -138,6 +374,24 @@ class PodcastScriptGenerator:
         self.logger = get_logger(__name__)
         self.llm_provider = self._setup_llm_provider()
         
+        # Validate the prompt template up front instead of failing mid-pipeline
+        self._prompt_template = self.config['llm']['podcast_prompt_template']
+        if '{articles}' not in self._prompt_template:
+            raise ValueError("llm.podcast_prompt_template must contain an {articles} placeholder")
+        
+        # Optionally serve repeated prompts from the on-disk response cache
+        cache_config = self.config['llm'].get('cache') or {}
+        if cache_config.get('enabled', False):
+            from .cache import CachingLLMProvider
+            self.llm_provider = CachingLLMProvider(
+                self.llm_provider,
+                cache_dir=cache_config.get('dir'),
+                semantic_threshold=cache_config.get('semantic_threshold'),
+                embedding_model=self.config.get('embeddings', {}).get(
+                    'model_name', "sentence-transformers/all-MiniLM-L6-v2"
+                )
+            )
+        
     def _setup_llm_provider(self) -> LLMProvider:
         """Setup LLM provider based on configuration"""
         provider_name = self.config['llm']['provider']
@@ -148,6 +402,12 @@ class PodcastScriptGenerator:
                 raise ValueError("OpenAI API key not found in configuration")
             return OpenAIProvider(api_key, self.config['llm']['model'])
             
+        elif provider_name == 'openai_batch':
+            api_key = self.config['api_keys']['openai']
+            if not api_key:
+                raise ValueError("OpenAI API key not found in configuration")
+            return OpenAIBatchProvider(api_key, self.config['llm']['model'])
+            
         elif provider_name == 'anthropic':
             api_key = self.config['api_keys']['anthropic']
             if not api_key:
@@ -163,6 +423,10 @@ class PodcastScriptGenerator:
         else:
             raise ValueError(f"Unsupported LLM provider: {provider_name}")
     
+    async def aclose(self) -> None:
+        """Release the LLM provider's connections"""
+        await self.llm_provider.aclose()
+    
     async def generate_podcast_script(self, articles: List[Dict]) -> str:
         """
         Generate podcast script from selected articles
@@ -193,62 +457,38 @@ class PodcastScriptGenerator:
     
     def _prepare_articles_summary(self, articles: List[Dict]) -> str:
         """Prepare a summary of articles for the prompt"""
-        summaries = []
+        buf = io.StringIO()
         
         for i, article in enumerate(articles[:10], 1):  # Limit to top 10
-            summary = f"""
-Article {i}:
-Title: {article.get('title', 'N/A')}
-Authors: {', '.join(article.get('authors', [])) if article.get('authors') else 'N/A'}
-Journal: {article.get('journal', 'N/A')}
-Publication Date: {article.get('publication_date', 'N/A')}
-Similarity Score: {article.get('combined_score', 0):.3f}
-
-Abstract: {article.get('abstract', 'N/A')[:500]}{'...' if len(article.get('abstract', '')) > 500 else ''}
-
-Key Findings: {self._extract_key_findings(article)}
-"""
-            summaries.append(summary)
-        
-        return "\n".join(summaries)
+            abstract = article.get('abstract') or ''
+            authors = article.get('authors') or ()
+            
+            if i > 1:
+                buf.write("\n")
+            buf.write(f"\nArticle {i}:\n")
+            buf.write(f"Title: {article.get('title', 'N/A')}\n")
+            buf.write(f"Authors: {', '.join(authors) if authors else 'N/A'}\n")
+            buf.write(f"Journal: {article.get('journal', 'N/A')}\n")
+            buf.write(f"Publication Date: {article.get('publication_date', 'N/A')}\n")
+            buf.write(f"Similarity Score: {article.get('combined_score', 0):.3f}\n\n")
+            buf.write("Abstract: ")
+            buf.write(abstract[:500] + ('...' if len(abstract) > 500 else '') if abstract else 'N/A')
+            buf.write(f"\n\nKey Findings: {self._extract_key_findings(article)}\n")
+        
+        return buf.getvalue()
     
     def _extract_key_findings(self, article: Dict) -> str:
         """Extract key findings from article (simplified version)"""
-        abstract = article.get('abstract', '')
+        abstract = article.get('abstract') or ''
         
         # Simple heuristic: look for conclusion-like sentences
-        sentences = abstract.split('.')
-        key_sentences = []
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if any(keyword in sentence.lower() for keyword in 
-                   ['found', 'showed', 'demonstrated', 'revealed', 'concluded', 'results indicate']):
-                key_sentences.append(sentence)
+        key_sentences = [match.strip() for match in _FINDINGS_RE.findall(abstract)[:2]]
         
-        return '. '.join(key_sentences[:2]) if key_sentences else "Key findings not extracted."
+        return '. '.join(key_sentences) if key_sentences else "Key findings not extracted."
     
     def _build_podcast_prompt(self, articles_summary: str) -> str:
         """Build the prompt for podcast script generation"""
-        
-        base_prompt = self.config['llm']['podcast_prompt_template']
-        
-        enhanced_prompt = f"""
-{base_prompt.format(articles=articles_summary)}
-
-Additional Instructions:
-- Focus on the most impactful and interconnected findings
-- Create smooth transitions between different topics
-- Include brief explanations of complex scientific terms
-- Maintain an engaging, conversational tone
-- Structure: Opening hook (30 seconds), Main content (4 minutes), Closing (30 seconds)
-- Target audience: Educated general public with interest in science
-- Mention that this is generated from recent research relevant to IFC-UNAM's research areas
-
-Please generate a complete podcast script with clear sections and timing cues.
-"""
-        
-        return enhanced_prompt
+        return "\n" + self._prompt_template.format(articles=articles_summary) + _PODCAST_PROMPT_SUFFIX
     
     async def generate_episode_metadata(self, script: str, articles: List[Dict]) -> Dict:
         """
@@ -261,11 +501,17 @@ Please generate a complete podcast script with clear sections and timing cues.
         Returns:
             Dictionary with episode metadata
         """
-        # Extract title from script or generate one
-        title_prompt = f"""
-Based on this podcast script, generate a compelling episode title (max 60 characters):
+        # Both prompts start with the same script excerpt so providers can cache it
+        script_prefix = f"""
+Podcast script excerpt:
 
-{script[:1000]}...
+{script[:1500]}...
+"""
+        cache_key = hashlib.sha256(script_prefix.encode('utf-8')).hexdigest()[:32]
+        
+        # Extract title from script or generate one
+        title_prompt = script_prefix + """
+Based on this podcast script, generate a compelling episode title (max 60 characters).
 
 Title should be:
 - Engaging and informative
@@ -276,17 +522,9 @@ Title should be:
 Respond with only the title, no additional text.
 """
         
-        title = await self.llm_provider.generate_response(
-            title_prompt,
-            temperature=0.5,
-            max_tokens=100
-        )
-        
         # Generate description
-        description_prompt = f"""
-Write a brief podcast episode description (100-150 words) based on this script:
-
-{script[:1500]}...
+        description_prompt = script_prefix + """
+Write a brief podcast episode description (100-150 words) based on this script.
 
 Description should:
 - Summarize key topics covered
@@ -297,67 +535,89 @@ Description should:
 Respond with only the description text.
 """
         
-        description = await self.llm_provider.generate_response(
-            description_prompt,
-            temperature=0.6,
-            max_tokens=200
+        # Title and description only depend on the script, so request them together
+        # (concurrently, or as a single job for the batch provider)
+        title, description = await self.llm_provider.generate_responses([
+            (title_prompt, {
+                'temperature': 0.5,
+                'max_tokens': 100,
+                'prompt_cache_key': cache_key,
+                'cache_prefix': script_prefix
+            }),
+            (description_prompt, {
+                'temperature': 0.6,
+                'max_tokens': 200,
+                'prompt_cache_key': cache_key,
+                'cache_prefix': script_prefix
+            })
+        ])
+        
+        # Extract keywords from articles: top 3 MeSH terms and keywords per article,
+        # deduplicated in first-seen order so the metadata is deterministic
+        keywords = dict.fromkeys(chain.from_iterable(
+            chain((article.get('mesh_terms') or ())[:3], (article.get('keywords') or ())[:3])
+            for article in articles
+        ))
+        top_journals = dict.fromkeys(
+            article['journal'] for article in articles[:5] if article.get('journal')
         )
         
-        # Extract keywords from articles
-        keywords = set()
-        for article in articles:
-            if article.get('mesh_terms'):
-                keywords.update(article['mesh_terms'][:3])  # Top 3 MeSH terms per article
-            if article.get('keywords'):
-                keywords.update(article['keywords'][:3])
-        
         metadata = {
             'title': title.strip(),
             'description': description.strip(),
-            'keywords': list(keywords)[:10],  # Limit to 10 keywords
+            'keywords': list(islice(keywords, 10)),  # Limit to 10 keywords
             'source_articles_count': len(articles),
-            'top_journals': list(set([article.get('journal', '') for article in articles[:5]])),
-            'generation_date': str(pd.Timestamp.now().date()) if 'pd' in globals() else None
+            'top_journals': list(top_journals),
+            'generation_date': date.today().isoformat()
         }
         
         return metadata
     
+    async def generate_episode(self, articles: List[Dict]) -> Tuple[str, Dict]:
+        """
+        Generate the podcast script and then its metadata
+        
+        Args:
+            articles: List of article dictionaries with similarity scores
+            
+        Returns:
+            Tuple of (script, metadata)
+        """
+        script = await self.generate_podcast_script(articles)
+        metadata = await self.generate_episode_metadata(script, articles)
+        return script, metadata
+    
+    def _script_lines(self, script: str, metadata: Dict = None) -> Iterator[str]:
+        """Yield the markdown lines of a saved script, with metadata header if given"""
+        if metadata:
+            yield "# Podcast Episode\n"
+            yield f"## {metadata.get('title', 'Untitled Episode')}\n"
+            yield "\n"
+            yield "### Metadata\n"
+            yield f"- **Generated**: {metadata.get('generation_date', 'Unknown')}\n"
+            yield f"- **Source Articles**: {metadata.get('source_articles_count', 0)}\n"
+            yield f"- **Keywords**: {', '.join(metadata.get('keywords', []))}\n"
+            yield "\n"
+            yield "### Description\n"
+            yield metadata.get('description', '')
+            yield "\n\n---\n\n"
+        
+        yield "## Script\n"
+        yield "\n"
+        yield script
+    
     def save_script(self, script: str, metadata: Dict = None, output_path: str = None) -> str:
         """Save podcast script to file"""
         if not output_path:
-            from ..utils.config import get_output_dir
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = get_output_dir() / "scripts" / f"podcast_script_{timestamp}.md"
         
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Create formatted script with metadata
-        full_content = []
-        
-        if metadata:
-            full_content.append("# Podcast Episode")
-            full_content.append(f"## {metadata.get('title', 'Untitled Episode')}")
-            full_content.append("")
-            full_content.append("### Metadata")
-            full_content.append(f"- **Generated**: {metadata.get('generation_date', 'Unknown')}")
-            full_content.append(f"- **Source Articles**: {metadata.get('source_articles_count', 0)}")
-            full_content.append(f"- **Keywords**: {', '.join(metadata.get('keywords', []))}")
-            full_content.append("")
-            full_content.append("### Description")
-            full_content.append(metadata.get('description', ''))
-            full_content.append("")
-            full_content.append("---")
-            full_content.append("")
-        
-        full_content.append("## Script")
-        full_content.append("")
-        full_content.append(script)
-        
-        # Write to file
+        # Write the formatted script line by line
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(full_content))
+            f.writelines(self._script_lines(script, metadata))
         
         self.logger.info(f"Saved podcast script to {output_path}")
         return str(output_path)
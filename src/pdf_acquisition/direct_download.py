@@ -1,16 +1,24 @@
 """Direct DOI download module using Sci-Hub mirrors."""
 
 import os
-import time
+import shutil
+import asyncio
+import aiohttp
 import requests
-from typing import List, Tuple
+from typing import List, Optional
 
 
 class DirectDownloader:
     """Direct PDF downloader from DOI using Sci-Hub mirrors."""
     
-    def __init__(self):
-        """Initialize the direct downloader with default configuration."""
+    def __init__(self, max_concurrent: int = 4, timeout: float = 10):
+        """
+        Initialize the direct downloader with default configuration.
+        
+        Args:
+            max_concurrent: Maximum number of DOIs downloaded at the same time
+            timeout: Connect/read timeout in seconds for each request
+        """
         # List of Sci-Hub mirrors to try
         self.mirrors = [
             "https://sci-hub.se/",
@@ -18,16 +26,24 @@ class DirectDownloader:
             "https://sci-hub.ru/",
         ]
         
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.chunk_size = 1 << 16  # Bytes per streamed write
+        self.copy_buffer_size = 1 << 20  # Buffer for the sync raw-stream copy
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        
         # Session configuration
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.session.headers.update(self.headers)
     
     def download_doi(self, doi: str, output_dir: str) -> bool:
         """
         Download a single paper by DOI.
         
+        Blocks the calling thread; use download_doi_async from async code.
+        
         Args:
             doi: The DOI to download
             output_dir: Directory to save the PDF
@@ -37,38 +53,159 @@ class DirectDownloader:
         """
         print(f"Downloading DOI: {doi}")
         
+        filepath = os.path.join(output_dir, f"{doi.replace('/', '_')}.pdf")
+        # Streamed into a .part file and only renamed once complete, so an
+        # interrupted download never leaves a truncated PDF under its real name
+        part_path = filepath + '.part'
+        
         for mirror in self.mirrors:
             try:
                 url = f"{mirror}{doi}"
-                response = self.session.get(url, timeout=10)
                 
-                if response.status_code == 200:
-                    # Check if response is PDF
-                    if 'application/pdf' in response.headers.get('content-type', ''):
-                        # Save PDF
-                        filename = f"{doi.replace('/', '_')}.pdf"
-                        filepath = os.path.join(output_dir, filename)
-                        
-                        with open(filepath, 'wb') as f:
-                            f.write(response.content)
-                            
-                        print(f"✅ Downloaded to {filepath}")
-                        return True
-                    else:
-                        # Handle HTML response (Sci-Hub page)
-                        # You'd need a more sophisticated parser to extract the PDF link from the HTML
-                        continue
+                # Stream the body so only the headers are read before deciding
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    if response.status_code == 200:
+                        # Check if response is PDF
+                        if 'application/pdf' in response.headers.get('content-type', ''):
+                            # Copy the raw stream to disk through one reused buffer
+                            response.raw.decode_content = True
+                            with open(part_path, 'wb') as f:
+                                shutil.copyfileobj(response.raw, f, self.copy_buffer_size)
+                            os.replace(part_path, filepath)
+                                
+                            print(f"✅ Downloaded to {filepath}")
+                            return True
+                        else:
+                            # Handle HTML response (Sci-Hub page)
+                            # You'd need a more sophisticated parser to extract the PDF link from the HTML
+                            continue
                         
             except Exception as e:
                 print(f"Failed with {mirror}: {e}")
+                if os.path.exists(part_path):
+                    os.remove(part_path)
                 continue
                 
         print(f"❌ Failed to download {doi}")
         return False
     
-    def bulk_download(self, dois: List[str], output_dir: str = '../papers/downloaded/direct') -> int:
+    async def _fetch_pdf(self, session: aiohttp.ClientSession, url: str, part_path: str) -> bool:
         """
-        Download multiple papers from DOIs.
+        Stream a URL to disk only if it is a PDF.
+        
+        Args:
+            session: Shared aiohttp session
+            url: Mirror URL for the DOI
+            part_path: Temporary path the body is streamed to
+            
+        Returns:
+            bool: True if a PDF was written to ``part_path``
+        """
+        async with session.get(url) as response:
+            if response.status != 200 or 'application/pdf' not in response.headers.get('content-type', ''):
+                # Sci-Hub HTML pages would need a parser to extract the PDF link
+                return False
+            
+            try:
+                loop = asyncio.get_running_loop()
+                with open(part_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        # Write in a worker thread so disk I/O doesn't block other downloads
+                        await loop.run_in_executor(None, f.write, chunk)
+            except BaseException:
+                # Failed or lost the race against another mirror
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+            
+            return True
+    
+    async def _download_doi(
+        self, 
+        session: aiohttp.ClientSession, 
+        doi: str, 
+        output_dir: str, 
+        semaphore: asyncio.Semaphore
+    ) -> bool:
+        """
+        Download a single paper by DOI, racing all mirrors concurrently.
+        
+        Args:
+            session: Shared aiohttp session
+            doi: The DOI to download
+            output_dir: Directory to save the PDF
+            semaphore: Limits how many DOIs are downloaded at once
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        async with semaphore:
+            print(f"Downloading DOI: {doi}")
+            
+            filename = f"{doi.replace('/', '_')}.pdf"
+            filepath = os.path.join(output_dir, filename)
+            
+            # Each mirror streams to its own partial file
+            tasks = {}
+            for i, mirror in enumerate(self.mirrors):
+                part_path = f"{filepath}.{i}.part"
+                task = asyncio.create_task(self._fetch_pdf(session, f"{mirror}{doi}", part_path))
+                tasks[task] = (mirror, part_path)
+            
+            try:
+                # Use the first mirror that answers with a PDF
+                while tasks:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    
+                    for task in done:
+                        mirror, part_path = tasks.pop(task)
+                        try:
+                            is_pdf = task.result()
+                        except Exception as e:
+                            print(f"Failed with {mirror}: {e}")
+                            continue
+                        
+                        if is_pdf:
+                            os.replace(part_path, filepath)
+                            print(f"✅ Downloaded to {filepath}")
+                            return True
+            finally:
+                # Cancel the mirrors that lost the race
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                
+                # Mirrors that finished alongside the winner leave a partial file behind
+                for _, part_path in tasks.values():
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+            
+            print(f"❌ Failed to download {doi}")
+            return False
+    
+    def _client_session(self) -> aiohttp.ClientSession:
+        """Create an aiohttp session with the downloader's headers, timeouts and connection limits."""
+        timeout = aiohttp.ClientTimeout(sock_connect=self.timeout, sock_read=self.timeout)
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_concurrent)
+        return aiohttp.ClientSession(headers=self.headers, timeout=timeout, connector=connector)
+    
+    async def download_doi_async(self, doi: str, output_dir: str) -> bool:
+        """
+        Download a single paper by DOI without blocking the event loop.
+        
+        Args:
+            doi: The DOI to download
+            output_dir: Directory to save the PDF
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        async with self._client_session() as session:
+            return await self._download_doi(session, doi, output_dir, asyncio.Semaphore(1))
+    
+    async def bulk_download(self, dois: List[str], output_dir: str = '../papers/downloaded/direct') -> int:
+        """
+        Download multiple papers from DOIs concurrently.
         
         Args:
             dois: List of DOIs to download
@@ -78,12 +215,15 @@ class DirectDownloader:
             int: Number of successfully downloaded papers
         """
         os.makedirs(output_dir, exist_ok=True)
-        success_count = 0
         
-        for doi in dois:
-            if self.download_doi(doi, output_dir):
-                success_count += 1
-            time.sleep(2)  # Be respectful to servers
+        # Be respectful to servers: bounded concurrency instead of a fixed sleep
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        async with self._client_session() as session:
+            results = await asyncio.gather(
+                *(self._download_doi(session, doi, output_dir, semaphore) for doi in dois)
+            )
         
+        success_count = sum(results)
         print(f"\nDownload summary: {success_count}/{len(dois)} papers downloaded")
-        return success_count
\ No newline at end of file
+        return success_count
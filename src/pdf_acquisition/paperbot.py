@@ -2,9 +2,12 @@
 
 import os
 import sys
-import time
+import asyncio
+import shutil
+import tempfile
 import subprocess
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 
 
 class PyPaperBotWrapper:
@@ -13,22 +16,34 @@ class PyPaperBotWrapper:
     def __init__(self):
         """Initialize the PyPaperBot wrapper."""
         self.base_command = ["python", "-m", "PyPaperBot"]
+        
+        # Results of the environment checks, cached for the wrapper's lifetime
+        self._dependencies_ok = None
+        self._chrome_installed = None
     
     def check_dependencies(self) -> bool:
         """Check if PyPaperBot and its dependencies are installed."""
+        if self._dependencies_ok is not None:
+            return self._dependencies_ok
+        
         try:
             import importlib.util
             if importlib.util.find_spec("undetected_chromedriver") is None:
                 print("Installing missing dependency: undetected-chromedriver")
                 subprocess.check_call([sys.executable, "-m", "pip", "install", "undetected-chromedriver"])
                 print("Dependency installed successfully")
-            return True
+            self._dependencies_ok = True
         except Exception as e:
             print(f"Warning: Could not verify/install dependencies: {e}")
-            return False
+            self._dependencies_ok = False
+        
+        return self._dependencies_ok
     
     def check_chrome_installed(self) -> bool:
         """Check if Chrome/Chromium is installed on the system."""
+        if self._chrome_installed is not None:
+            return self._chrome_installed
+        
         chrome_paths = [
             "google-chrome",
             "chromium-browser",
@@ -38,17 +53,16 @@ class PyPaperBotWrapper:
         ]
         
         for path in chrome_paths:
-            try:
-                result = subprocess.run(["which", path], capture_output=True, text=True)
-                if result.returncode == 0:
-                    print(f"✅ Chrome/Chromium found at: {result.stdout.strip()}")
-                    return True
-            except Exception:
-                continue
+            found = shutil.which(path)
+            if found:
+                print(f"✅ Chrome/Chromium found at: {found}")
+                self._chrome_installed = True
+                return True
         
         print("❌ Chrome/Chromium not found. Please install it for PyPaperBot to work properly.")
         print("   On Ubuntu/Debian: sudo apt install chromium-browser")
         print("   On Fedora: sudo dnf install chromium")
+        self._chrome_installed = False
         return False
     
     def download_papers(
@@ -80,15 +94,54 @@ class PyPaperBotWrapper:
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        # Build command
+        # Execute command
+        try:
+            with self._doi_arguments(dois) as doi_args:
+                cmd = self._build_command(doi_args, output_dir, min_year, mode, use_doi_filename)
+                print(f"Executing command: {' '.join(cmd)}")
+                result = subprocess.run(cmd, capture_output=True, text=True)
+            
+            # Print output
+            print("\nOutput:")
+            print(result.stdout)
+            
+            if result.stderr:
+                print("\nErrors:")
+                print(result.stderr)
+                
+            return result.returncode == 0
+        except Exception as e:
+            print(f"Error executing PyPaperBot: {e}")
+            return False
+    
+    @contextmanager
+    def _doi_arguments(self, dois: Optional[List[str]]) -> Iterator[List[str]]:
+        """Yield the PyPaperBot DOI arguments, using a temporary DOI file for several DOIs."""
+        if not dois:
+            yield []
+        elif len(dois) == 1:
+            # A single DOI can be passed directly on the command line
+            yield ["--doi", dois[0]]
+        else:
+            # Unique file per call so concurrent downloads don't overwrite each other
+            with tempfile.NamedTemporaryFile('w', prefix='dois_', suffix='.txt', delete=False) as f:
+                f.writelines(f"{doi}\n" for doi in dois)
+            try:
+                yield ["--doi-file", f.name]
+            finally:
+                os.remove(f.name)
+    
+    def _build_command(
+        self, 
+        doi_args: List[str], 
+        output_dir: str, 
+        min_year: Optional[int], 
+        mode: int, 
+        use_doi_filename: bool
+    ) -> List[str]:
+        """Build the PyPaperBot command line for a download into ``output_dir``."""
         cmd = self.base_command.copy()
-        
-        if dois:
-            # For multiple DOIs, create a temporary DOI file
-            doi_file = os.path.join(output_dir, "temp_dois.txt")
-            with open(doi_file, 'w') as f:
-                f.write('\n'.join(dois))
-            cmd.extend(["--doi-file", doi_file])
+        cmd.extend(doi_args)
         
         # Add output directory
         cmd.extend(["--dwn-dir", output_dir])
@@ -104,62 +157,92 @@ class PyPaperBotWrapper:
         if use_doi_filename:
             cmd.append("--use-doi-as-filename")
         
-        # Execute command
-        print(f"Executing command: {' '.join(cmd)}")
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
+        return cmd
+    
+    async def _download_chunk(
+        self, 
+        chunk: List[str], 
+        chunk_dir: str, 
+        label: str, 
+        semaphore: asyncio.Semaphore
+    ) -> bool:
+        """
+        Run PyPaperBot for one chunk of DOIs in a subprocess.
+        
+        Args:
+            chunk: DOIs in this chunk
+            chunk_dir: Directory the chunk downloads into
+            label: Progress label printed for this chunk
+            semaphore: Limits how many PyPaperBot processes run at once
             
-            # Print output
-            print("\nOutput:")
-            print(result.stdout)
+        Returns:
+            bool: True if PyPaperBot exited successfully
+        """
+        async with semaphore:
+            print(f"\nProcessing chunk {label} ({len(chunk)} DOIs)")
+            os.makedirs(chunk_dir, exist_ok=True)
             
-            if result.stderr:
-                print("\nErrors:")
-                print(result.stderr)
-                
-            return result.returncode == 0
-        except Exception as e:
-            print(f"Error executing PyPaperBot: {e}")
+            log_path = os.path.join(chunk_dir, "pypaperbot.log")
+            
+            try:
+                # Output goes straight to a per-chunk log file instead of being buffered
+                with self._doi_arguments(chunk) as doi_args, open(log_path, 'wb') as log_file:
+                    cmd = self._build_command(doi_args, chunk_dir, None, 1, True)
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd, stdout=log_file, stderr=asyncio.subprocess.STDOUT
+                    )
+                    returncode = await proc.wait()
+            except Exception as e:
+                print(f"Error executing PyPaperBot for chunk {label}: {e}")
+                return False
+            
+            if returncode == 0:
+                print(f"✅ Chunk {label} finished")
+                return True
+            
+            print(f"❌ Chunk {label} failed (exit code {returncode}), see {log_path}")
             return False
     
-    def bulk_download(
+    async def bulk_download(
         self, 
         all_dois: List[str], 
         output_dir: str, 
-        chunk_size: int = 50
+        chunk_size: int = 50,
+        max_concurrent: int = 3
     ) -> bool:
         """
-        Download papers in chunks to avoid overwhelming the system.
+        Download papers in chunks, running a bounded number of chunks at once.
         
         Args:
             all_dois: List of all DOIs to download
             output_dir: Directory to save outputs
             chunk_size: Number of DOIs per chunk
+            max_concurrent: Maximum number of PyPaperBot processes at once
             
         Returns:
             bool: True if all chunks successful, False otherwise
         """
+        if not self.check_dependencies() or not self.check_chrome_installed():
+            print("❌ Dependencies not satisfied")
+            return False
+        
         os.makedirs(output_dir, exist_ok=True)
         
-        # Process in chunks
-        success_count = 0
+        # Be respectful to servers: bounded concurrency instead of a fixed sleep
+        semaphore = asyncio.Semaphore(max_concurrent)
         total_chunks = (len(all_dois) + chunk_size - 1) // chunk_size
         
-        for i in range(0, len(all_dois), chunk_size):
-            chunk = all_dois[i:i+chunk_size]
-            chunk_num = (i // chunk_size) + 1
-            
-            print(f"\nProcessing chunk {chunk_num}/{total_chunks} ({len(chunk)} DOIs)")
-            chunk_dir = os.path.join(output_dir, f"batch_{chunk_num}")
-            
-            if self.download_papers(chunk, output_dir=chunk_dir, mode=1):
-                success_count += 1
-                
-            # Add delay between chunks
-            if chunk_num < total_chunks:
-                print("Waiting before next batch...")
-                time.sleep(30)  # 30 second delay between batches
+        results = await asyncio.gather(*(
+            self._download_chunk(
+                all_dois[i:i+chunk_size],
+                os.path.join(output_dir, f"batch_{chunk_num}"),
+                f"{chunk_num}/{total_chunks}",
+                semaphore
+            )
+            for chunk_num, i in enumerate(range(0, len(all_dois), chunk_size), 1)
+        ))
         
+        success_count = sum(results)
         success = success_count == total_chunks
         print(f"\nCompleted {success_count}/{total_chunks} batches successfully")
-        return success
\ No newline at end of file
+        return success
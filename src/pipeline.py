@@ -3,18 +3,26 @@ Main pipeline orchestrator for the podcast generation system
 """
 
 import asyncio
+import os
+import time
+from functools import cached_property
 from typing import Dict, List, Optional
 from pathlib import Path
 import json
-from datetime import datetime
+
+try:
+    import orjson  # Optional, faster JSON serialization
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq  # Optional, faster IFC article cache
+except ImportError:
+    pa = None
 
 from .utils.logger import setup_logger, get_logger
 from .utils.config import load_config, get_output_dir
-from .scrapers.ifc_scraper import IFCPublicationScraper
-from .pubmed.searcher import PubMedSearcher
-from .embeddings.manager import EmbeddingsManager
-from .llm.script_generator import PodcastScriptGenerator
-from .audio.generator import AudioGenerator
 
 
 class PodcastPipeline:
@@ -32,18 +40,15 @@ class PodcastPipeline:
         # Setup logging
         setup_logger(
             level=self.config.get('logging', {}).get('level', 'INFO'),
-            log_file=self.config.get('logging', {}).get('file')
+            log_file=self.config.get('logging', {}).get('file'),
+            json_file=self.config.get('logging', {}).get('json', True)
         )
         
         self.logger = get_logger(__name__)
         self.logger.info("Initializing Podcast Pipeline")
         
-        # Initialize components
-        self.ifc_scraper = IFCPublicationScraper(self.config)
-        self.pubmed_searcher = PubMedSearcher(self.config)
-        self.embeddings_manager = EmbeddingsManager(self.config)
-        self.script_generator = PodcastScriptGenerator(self.config)
-        self.audio_generator = AudioGenerator(self.config)
+        # Components are created on first use (see the properties below), so
+        # constructing the pipeline doesn't import torch, LLM SDKs or TTS backends
         
         # Pipeline state
         self.ifc_articles = []
@@ -51,6 +56,39 @@ class PodcastPipeline:
         self.selected_articles = []
         self.podcast_script = ""
         self.audio_path = ""
+        
+        # Shared by every file a run writes, so their names always match
+        self._run_timestamp: Optional[str] = None
+    
+    @cached_property
+    def ifc_scraper(self):
+        """IFC publication scraper"""
+        from .scrapers.ifc_scraper import IFCPublicationScraper
+        return IFCPublicationScraper(self.config)
+    
+    @cached_property
+    def pubmed_searcher(self):
+        """PubMed search client"""
+        from .pubmed.searcher import PubMedSearcher
+        return PubMedSearcher(self.config)
+    
+    @cached_property
+    def embeddings_manager(self):
+        """Embeddings and similarity search"""
+        from .embeddings.manager import EmbeddingsManager
+        return EmbeddingsManager(self.config)
+    
+    @cached_property
+    def script_generator(self):
+        """LLM podcast script generator"""
+        from .llm.script_generator import PodcastScriptGenerator
+        return PodcastScriptGenerator(self.config)
+    
+    @cached_property
+    def audio_generator(self):
+        """Text-to-speech audio generator"""
+        from .audio.generator import AudioGenerator
+        return AudioGenerator(self.config)
     
     async def run_full_pipeline(self, force_refresh: bool = False) -> Dict:
         """
@@ -63,16 +101,26 @@ class PodcastPipeline:
             Dictionary with pipeline results
         """
         self.logger.info("Starting full podcast generation pipeline")
+        self._run_timestamp = time.strftime("%Y%m%d_%H%M%S")
         
         try:
             # Step 1: Get IFC articles (scrape or load from cache)
             await self._step_1_get_ifc_articles(force_refresh)
             
-            # Step 2: Analyze research themes
-            theme_analysis = await self._step_2_analyze_themes()
+            # Both steps below use the embeddings manager; build it (and load its
+            # model) once here, off the event loop, so the two steps don't race
+            # to create it from different threads
+            await asyncio.get_running_loop().run_in_executor(
+                None, getattr, self, 'embeddings_manager'
+            )
             
-            # Step 3: Search PubMed for relevant articles
-            await self._step_3_search_pubmed(theme_analysis)
+            # Steps 2 and 3: cluster research themes while PubMed is searched with
+            # keywords taken straight from the IFC titles, so the CPU-bound embedding
+            # work overlaps the network-bound search
+            await asyncio.gather(
+                self._step_2_analyze_themes(),
+                self._step_3_search_pubmed()
+            )
             
             # Step 4: Find most similar articles
             await self._step_4_find_similar_articles()
@@ -97,61 +145,109 @@ class PodcastPipeline:
         """Step 1: Get IFC articles"""
         self.logger.info("Step 1: Getting IFC articles")
         
-        # Check if we have cached articles
-        cache_path = Path("data/processed/ifc_articles_cache.json")
+        # Check if we have cached articles (Parquet when pyarrow is installed, else JSON)
+        json_cache_path = Path("data/processed/ifc_articles_cache.json")
+        cache_path = json_cache_path.with_suffix('.parquet') if pa is not None else json_cache_path
         
+        # Cache reads and writes run in a worker thread so they don't block the event loop
+        loop = asyncio.get_running_loop()
         if not force_refresh and cache_path.exists():
             self.logger.info("Loading IFC articles from cache")
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                self.ifc_articles = json.load(f)
+            self.ifc_articles = await loop.run_in_executor(None, self._load_ifc_cache, cache_path)
+        elif not force_refresh and json_cache_path.exists():
+            # Existing JSON cache from before pyarrow was installed; migrate it
+            self.logger.info("Loading IFC articles from JSON cache")
+            self.ifc_articles = await loop.run_in_executor(None, self._load_ifc_cache, json_cache_path)
+            await loop.run_in_executor(None, self._save_ifc_cache, cache_path)
         else:
             self.logger.info("Scraping IFC articles")
             articles = await self.ifc_scraper.scrape_all_years()
             
-            # Convert to dict format and save
-            self.ifc_articles = []
-            for article in articles:
-                self.ifc_articles.append({
-                    'title': article.title,
-                    'authors': article.authors,
-                    'journal': article.journal,
-                    'year': article.year,
-                    'doi': article.doi,
-                    'pubmed_id': article.pubmed_id,
-                    'ifc_url': article.ifc_url,
-                    'abstract': article.abstract,
-                    'keywords': article.keywords
-                })
+            # Convert to dict format and save (shallow copies of the dataclass fields)
+            self.ifc_articles = [article.to_dict() for article in articles]
             
             # Cache the results
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(self.ifc_articles, f, indent=2, ensure_ascii=False)
+            await loop.run_in_executor(None, self._save_ifc_cache, cache_path)
         
         self.logger.info(f"Loaded {len(self.ifc_articles)} IFC articles")
     
+    @staticmethod
+    def _load_ifc_cache(cache_path: Path) -> List[Dict]:
+        """Read the IFC articles cache as Parquet or JSON depending on the path suffix"""
+        if cache_path.suffix == '.parquet':
+            # Memory-mapped columnar read avoids parsing a large JSON document
+            return pq.read_table(cache_path, memory_map=True).to_pylist()
+        if orjson is not None:
+            return orjson.loads(cache_path.read_bytes())
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _save_ifc_cache(self, cache_path: Path) -> None:
+        """Write the IFC articles cache as Parquet or JSON depending on the path suffix"""
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        if cache_path.suffix == '.parquet':
+            tmp_path = cache_path.with_suffix(cache_path.suffix + '.tmp')
+            pq.write_table(pa.Table.from_pylist(self.ifc_articles), tmp_path, compression='zstd')
+            os.replace(tmp_path, cache_path)
+        else:
+            self._write_json(self.ifc_articles, cache_path)
+    
+    @staticmethod
+    def _write_json(data, path: Path) -> None:
+        """
+        Write indented UTF-8 JSON, using orjson when it is installed
+        
+        The data is written to a temporary file and renamed over ``path``, so a
+        crash mid-write never leaves a truncated file behind. Keep it that way:
+        a corrupt article cache silently forces a full re-scrape.
+        """
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        if orjson is not None:
+            tmp_path.write_bytes(orjson.dumps(
+                data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                default=str
+            ))
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    
     async def _step_2_analyze_themes(self) -> Dict:
         """Step 2: Analyze research themes"""
         self.logger.info("Step 2: Analyzing research themes")
         
+        # Embedding and clustering are CPU-bound, so keep them off the event loop
+        theme_analysis = await asyncio.get_running_loop().run_in_executor(
+            None, self._analyze_themes_sync
+        )
+        
+        self.logger.info(f"Identified {len(theme_analysis['clusters'])} research themes")
+        return theme_analysis
+    
+    def _analyze_themes_sync(self) -> Dict:
+        """Embed the IFC articles, cluster them and save the embeddings"""
+        embeddings_manager = self.embeddings_manager
+        
         # Process IFC articles for embeddings
-        self.embeddings_manager.process_ifc_articles(self.ifc_articles)
+        embeddings_manager.process_ifc_articles(self.ifc_articles)
         
         # Analyze themes
-        theme_analysis = self.embeddings_manager.analyze_research_themes()
+        theme_analysis = embeddings_manager.analyze_research_themes()
         
         # Save embeddings for future use
-        self.embeddings_manager.save_embeddings()
-        
-        self.logger.info(f"Identified {len(theme_analysis['clusters'])} research themes")
+        embeddings_manager.save_embeddings()
         return theme_analysis
     
-    async def _step_3_search_pubmed(self, theme_analysis: Dict) -> None:
+    async def _step_3_search_pubmed(self, theme_analysis: Optional[Dict] = None) -> None:
         """Step 3: Search PubMed for relevant articles"""
         self.logger.info("Step 3: Searching PubMed for relevant articles")
         
-        # Extract keywords for search
-        keywords = self.embeddings_manager.extract_research_keywords(theme_analysis)
+        # Extract keywords for search, from the themes if already analyzed
+        if theme_analysis:
+            keywords = self.embeddings_manager.extract_research_keywords(theme_analysis)
+        else:
+            keywords = self.embeddings_manager.extract_title_keywords(self.ifc_articles)
         
         # Search PubMed
         max_results = self.config['pubmed']['max_articles_per_week']
@@ -164,20 +260,8 @@ class PodcastPipeline:
         # Fetch article details
         articles = await self.pubmed_searcher.fetch_article_details(pmids)
         
-        # Convert to dict format
-        self.pubmed_articles = []
-        for article in articles:
-            self.pubmed_articles.append({
-                'pmid': article.pmid,
-                'title': article.title,
-                'abstract': article.abstract,
-                'authors': article.authors,
-                'journal': article.journal,
-                'publication_date': article.publication_date,
-                'doi': article.doi,
-                'keywords': article.keywords,
-                'mesh_terms': article.mesh_terms
-            })
+        # Convert to dict format (shallow copies of the dataclass fields)
+        self.pubmed_articles = [article.to_dict() for article in articles]
         
         self.logger.info(f"Found {len(self.pubmed_articles)} PubMed articles")
     
@@ -197,13 +281,8 @@ class PodcastPipeline:
         """Step 5: Generate podcast script"""
         self.logger.info("Step 5: Generating podcast script")
         
-        self.podcast_script = await self.script_generator.generate_podcast_script(
-            self.selected_articles
-        )
-        
-        # Generate metadata
-        self.script_metadata = await self.script_generator.generate_episode_metadata(
-            self.podcast_script, 
+        # Generate the script, then its title and description concurrently
+        self.podcast_script, self.script_metadata = await self.script_generator.generate_episode(
             self.selected_articles
         )
         
@@ -215,7 +294,8 @@ class PodcastPipeline:
         
         # Generate main podcast audio
         self.audio_path = await self.audio_generator.generate_audio(
-            self.podcast_script
+            self.podcast_script,
+            get_output_dir() / "podcasts" / f"podcast_{self._get_run_timestamp()}.mp3"
         )
         
         # Enhance audio quality
@@ -228,7 +308,7 @@ class PodcastPipeline:
         """Step 7: Save all results"""
         self.logger.info("Step 7: Saving results")
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = self._get_run_timestamp()
         output_dir = get_output_dir()
         
         # Save script
@@ -252,8 +332,9 @@ class PodcastPipeline:
         }
         
         episode_path = output_dir / f"episode_data_{timestamp}.json"
-        with open(episode_path, 'w', encoding='utf-8') as f:
-            json.dump(episode_data, f, indent=2, ensure_ascii=False, default=str)
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._write_json, episode_data, episode_path
+        )
         
         results = {
             'success': True,
@@ -267,26 +348,45 @@ class PodcastPipeline:
         self.logger.info(f"Results saved to {episode_path}")
         return results
     
+    def _get_run_timestamp(self) -> str:
+        """Timestamp of the current run, taken on first use if the run didn't set one"""
+        if self._run_timestamp is None:
+            self._run_timestamp = time.strftime("%Y%m%d_%H%M%S")
+        return self._run_timestamp
+    
     async def run_step_by_step(self) -> None:
         """Run pipeline step by step for testing"""
+        self._run_timestamp = time.strftime("%Y%m%d_%H%M%S")
+        # Each step with the component it uses, so the next one can be
+        # loaded while waiting at the review prompt
         steps = [
-            ("Get IFC Articles", self._step_1_get_ifc_articles),
-            ("Analyze Themes", self._step_2_analyze_themes),
-            ("Search PubMed", lambda: self._step_3_search_pubmed({})),
-            ("Find Similar Articles", self._step_4_find_similar_articles),
-            ("Generate Script", self._step_5_generate_script),
-            ("Generate Audio", self._step_6_generate_audio),
-            ("Save Results", self._step_7_save_results)
+            ("Get IFC Articles", self._step_1_get_ifc_articles, 'ifc_scraper'),
+            ("Analyze Themes", self._step_2_analyze_themes, 'embeddings_manager'),
+            ("Search PubMed", self._step_3_search_pubmed, 'pubmed_searcher'),
+            ("Find Similar Articles", self._step_4_find_similar_articles, 'embeddings_manager'),
+            ("Generate Script", self._step_5_generate_script, 'script_generator'),
+            ("Generate Audio", self._step_6_generate_audio, 'audio_generator'),
+            ("Save Results", self._step_7_save_results, None)
         ]
         
-        for step_name, step_func in steps:
+        loop = asyncio.get_running_loop()
+        for i, (step_name, step_func, _) in enumerate(steps):
             try:
                 self.logger.info(f"Running: {step_name}")
                 await step_func()
                 self.logger.info(f"Completed: {step_name}")
                 
-                # Pause for review
-                input(f"Press Enter to continue to next step...")
+                # Build the next step's component in the background during the pause.
+                # Errors are left for the step itself to raise when it runs.
+                next_component = steps[i + 1][2] if i + 1 < len(steps) else None
+                prefetch = None
+                if next_component and next_component not in vars(self):
+                    prefetch = loop.run_in_executor(None, getattr, self, next_component)
+                
+                # Pause for review without blocking the event loop
+                await loop.run_in_executor(None, input, "Press Enter to continue to next step...")
+                if prefetch is not None:
+                    await asyncio.gather(prefetch, return_exceptions=True)
                 
             except Exception as e:
                 self.logger.error(f"Failed at {step_name}: {str(e)}")
@@ -316,6 +416,15 @@ async def main():
         
     except Exception as e:
         print(f"Pipeline failed: {e}")
+    
+    finally:
+        # Only release HTTP connections for components that were ever created
+        if 'ifc_scraper' in vars(pipeline):
+            await pipeline.ifc_scraper.aclose()
+        if 'script_generator' in vars(pipeline):
+            await pipeline.script_generator.aclose()
+        if 'pubmed_searcher' in vars(pipeline):
+            await pipeline.pubmed_searcher.aclose()
 
 
 if __name__ == "__main__":
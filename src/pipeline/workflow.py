@@ -1,9 +1,12 @@
 """Main pipeline orchestration for database expansion workflow."""
 
 import os
+import re
 import json
+import sqlite3
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple
 
 # Use absolute imports that work when imported into notebooks
 try:
@@ -13,6 +16,7 @@ try:
     from affiliation_mining import EnhancedAffiliationMiner, AffiliationClustering
     from pubmed import EnhancedPubmedSearcher
     from data_quality import KeywordExtractor, PublicationClassifier
+    from utils.logger import get_logger
 except ImportError:
     # Fallback to relative imports for package installation
     from ..pdf_acquisition import PyPaperBotWrapper
@@ -21,6 +25,32 @@ except ImportError:
     from ..affiliation_mining import EnhancedAffiliationMiner, AffiliationClustering
     from ..pubmed import EnhancedPubmedSearcher
     from ..data_quality import KeywordExtractor, PublicationClassifier
+    from ..utils.logger import get_logger
+
+
+# Cleanup applied to approved affiliations before building PubMed queries
+_AFFILIATION_PUNCT_RE = re.compile(r'[,.:]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _clean_affiliation(affiliation: str) -> str:
+    """Drop punctuation PubMed treats as separators and collapse whitespace."""
+    return _WHITESPACE_RE.sub(' ', _AFFILIATION_PUNCT_RE.sub('', affiliation)).strip()
+
+
+# Per-process affiliation miner used by the parallel mining workers
+_worker_miner = None
+
+
+def _init_mining_worker() -> None:
+    """Load the spaCy models once in each worker process."""
+    global _worker_miner
+    _worker_miner = EnhancedAffiliationMiner()
+
+
+def _mine_affiliations(texts: List[str]) -> List[Set[str]]:
+    """Extract affiliations from a batch of PDF texts in a worker process."""
+    return _worker_miner.batch_extract(texts)
 
 
 class DatabaseExpansionPipeline:
@@ -28,6 +58,7 @@ class DatabaseExpansionPipeline:
     
     def __init__(self):
         """Initialize the database expansion pipeline."""
+        self.logger = get_logger(__name__)
         self.pdf_downloader = PyPaperBotWrapper()
         self.bibtex_manager = BibTexManager()
         self.database = PublicationDatabase()
@@ -37,60 +68,198 @@ class DatabaseExpansionPipeline:
         self.pubmed_searcher = EnhancedPubmedSearcher()
         self.keyword_extractor = KeywordExtractor()
         self.classifier = PublicationClassifier()
+        
+        # Worker pool for affiliation mining, created on first use and reused
+        self._mining_pool = None
+        self._mining_pool_workers = None
+    
+    def _get_mining_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        """Return the affiliation mining pool, recreating it if the size changed."""
+        if self._mining_pool is None or self._mining_pool_workers != max_workers:
+            if self._mining_pool is not None:
+                self._mining_pool.shutdown()
+            self._mining_pool = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_mining_worker
+            )
+            self._mining_pool_workers = max_workers
+        return self._mining_pool
+    
+    def close(self) -> None:
+        """Shut down the affiliation mining worker processes (and their spaCy models)."""
+        if self._mining_pool is not None:
+            self._mining_pool.shutdown()
+            self._mining_pool = None
+            self._mining_pool_workers = None
+    
+    def __enter__(self) -> "DatabaseExpansionPipeline":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    @staticmethod
+    def _open_affiliation_cache(output_json: str) -> sqlite3.Connection:
+        """Open the per-PDF affiliation cache stored next to the mining output."""
+        cache_dir = os.path.dirname(output_json) or '.'
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        cache = sqlite3.connect(os.path.join(cache_dir, '.pdf_aff_cache.sqlite'))
+        cache.execute("PRAGMA journal_mode=WAL")
+        cache.execute(
+            "CREATE TABLE IF NOT EXISTS pdf_affiliations (path TEXT PRIMARY KEY, mtime REAL, affs TEXT)"
+        )
+        return cache
+    
+    @staticmethod
+    def _load_cached_affiliations(
+        cache: sqlite3.Connection, 
+        mtimes: Dict[str, float]
+    ) -> Dict[str, List[str]]:
+        """Return cached affiliations for the PDFs not modified since they were mined."""
+        cached = {}
+        for path, mtime, affs in cache.execute("SELECT path, mtime, affs FROM pdf_affiliations"):
+            if mtimes.get(path) == mtime:
+                cached[path] = json.loads(affs)
+        return cached
+    
+    @staticmethod
+    def _store_cached_affiliations(
+        cache: sqlite3.Connection, 
+        entries: List[Tuple[str, float, Set[str]]]
+    ) -> None:
+        """Record the affiliations mined from each PDF with its modification time."""
+        cache.executemany(
+            "INSERT OR REPLACE INTO pdf_affiliations (path, mtime, affs) VALUES (?, ?, ?)",
+            [(path, mtime, json.dumps(sorted(affs), ensure_ascii=False)) for path, mtime, affs in entries]
+        )
+        cache.commit()
+    
+    def _mine_affiliations_one_by_one(
+        self, 
+        pdf_paths: List[str], 
+        texts: List[str]
+    ) -> Tuple[List[str], List[Set[str]]]:
+        """Mine each PDF on its own, logging and skipping the ones that fail."""
+        mined_paths = []
+        mined_affiliations = []
+        for pdf_path, text in zip(pdf_paths, texts):
+            try:
+                affiliations = self.affiliation_miner.extract_affiliations_advanced_nlp(text)
+            except Exception as e:
+                self.logger.error(f"Error processing {os.path.basename(pdf_path)}: {e}")
+                continue
+            mined_paths.append(pdf_path)
+            mined_affiliations.append(affiliations)
+        return mined_paths, mined_affiliations
     
     def mine_affiliations_from_pdfs(
         self, 
         pdf_dir: str, 
         output_json: Optional[str] = None, 
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        max_workers: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Extract affiliations from PDFs and return structured data.
         
+        When output_json is given, the affiliations of each PDF are cached next to it
+        and reused on later runs until the PDF is modified.
+        
         Args:
             pdf_dir: Directory containing PDFs to process
             output_json: Optional path to save results as JSON
             limit: Maximum number of PDFs to process
+            max_workers: Worker processes for text and NLP extraction (defaults to CPU count, 1 runs in-process)
             
         Returns:
             dict: Dictionary with affiliation data
         """
-        print("🔍 Initializing affiliation miner...")
+        self.logger.info("🔍 Initializing affiliation miner...")
+        
+        pdf_files = self.pdf_extractor.find_pdf_files(pdf_dir, limit)
+        self.logger.info(f"Found {len(pdf_files)} PDF files to process")
+        
+        # Skip PDFs whose affiliations were already mined and haven't changed since
+        cache = self._open_affiliation_cache(output_json) if output_json else None
+        mtimes = {pdf_path: os.path.getmtime(pdf_path) for pdf_path in pdf_files}
+        cached = self._load_cached_affiliations(cache, mtimes) if cache is not None else {}
+        if cached:
+            self.logger.info(f"♻️ Reusing cached affiliations for {len(cached)} unchanged PDFs")
         
         # Extract text from PDFs
-        print("\n📄 Extracting text from PDFs...")
-        pdf_texts = self.pdf_extractor.batch_process_pdfs(pdf_dir, limit)
+        self.logger.info("📄 Extracting text from PDFs...")
+        # Only the first pages are read, where affiliations typically appear
+        pdf_texts = self.pdf_extractor.extract_texts(
+            [pdf_path for pdf_path in pdf_files if pdf_path not in cached],
+            max_chars=20000, max_workers=max_workers
+        )
         
         try:
             # Mine affiliations from each PDF
-            print("\n🏢 Mining affiliations from extracted text...")
+            self.logger.info("🏢 Mining affiliations from extracted text...")
             all_affiliations = set()
             pdf_affiliations = {}
             
-            for filename, text in pdf_texts.items():
+            for pdf_path, affiliations in cached.items():
+                if affiliations:
+                    pdf_affiliations[os.path.basename(pdf_path)] = affiliations
+                    all_affiliations.update(affiliations)
+            
+            pdf_paths = list(pdf_texts)
+            texts = list(pdf_texts.values())
+            max_workers = min(max_workers or os.cpu_count() or 1, len(texts)) or 1
+            if max_workers > 1:
+                # spaCy extraction is CPU-bound, so spread batches of PDFs over worker
+                # processes; each worker runs its batch through a single nlp.pipe call
+                pool = self._get_mining_pool(max_workers)
+                batch_size = min(64, -(-len(texts) // max_workers))
+                batches = [
+                    (
+                        pdf_paths[i:i+batch_size], 
+                        texts[i:i+batch_size], 
+                        pool.submit(_mine_affiliations, texts[i:i+batch_size])
+                    )
+                    for i in range(0, len(texts), batch_size)
+                ]
+            else:
+                batches = [(pdf_paths, texts, None)]
+            
+            for batch_paths, batch_texts, future in batches:
                 try:
-                    # Process only the first few pages where affiliations typically appear
-                    first_pages_text = text[:20000]
-                    affiliations = self.affiliation_miner.extract_affiliations_advanced_nlp(first_pages_text)
-                    
+                    if future is not None:
+                        batch_affiliations = future.result()
+                    else:
+                        batch_affiliations = self.affiliation_miner.batch_extract(batch_texts)
+                except Exception as e:
+                    # Retry the batch one PDF at a time so a single bad file
+                    # doesn't cost the affiliations of the rest
+                    self.logger.warning(f"Batch of {len(batch_paths)} PDFs failed ({e}), retrying one by one")
+                    batch_paths, batch_affiliations = self._mine_affiliations_one_by_one(
+                        batch_paths, batch_texts
+                    )
+                
+                if cache is not None:
+                    self._store_cached_affiliations(cache, [
+                        (pdf_path, mtimes[pdf_path], affiliations)
+                        for pdf_path, affiliations in zip(batch_paths, batch_affiliations)
+                    ])
+                
+                for pdf_path, affiliations in zip(batch_paths, batch_affiliations):
                     if affiliations:
-                        pdf_affiliations[filename] = list(affiliations)
+                        pdf_affiliations[os.path.basename(pdf_path)] = list(affiliations)
                         all_affiliations.update(affiliations)
-                except Exception as e:
-                    print(f"Error processing {filename}: {e}")
-                    continue
             
             # Cluster similar affiliations
-            print(f"\n🧩 Clustering {len(all_affiliations)} discovered affiliations...")
+            self.logger.info(f"🧩 Clustering {len(all_affiliations)} discovered affiliations...")
             clusters = self.clustering.analyze_affiliations_with_clustering(list(all_affiliations))
             
             # Generate PubMed search variations
-            print("\n🔎 Generating PubMed search variations...")
+            self.logger.info("🔎 Generating PubMed search variations...")
             pubmed_variations = self.clustering.generate_pubmed_search_variations(clusters)
             
             # Compile results
             results = {
-                'total_pdfs_processed': len(pdf_texts),
+                'total_pdfs_processed': len(cached) + len(pdf_texts),
                 'total_affiliations_found': len(all_affiliations),
                 'affiliation_clusters': [
                     {'representative': cluster[0], 'variations': cluster} 
@@ -105,12 +274,12 @@ class DatabaseExpansionPipeline:
                 os.makedirs(os.path.dirname(output_json), exist_ok=True)
                 with open(output_json, 'w', encoding='utf-8') as f:
                     json.dump(results, f, indent=2, ensure_ascii=False)
-                print(f"\n✅ Results saved to {output_json}")
+                self.logger.info(f"✅ Results saved to {output_json}")
             
             return results
 
         except Exception as e:
-            print(f"❌ Error in affiliation mining process: {e}")
+            self.logger.error(f"❌ Error in affiliation mining process: {e}")
             if output_json:
                 # Save what we have so far as backup
                 with open(output_json + '.partial', 'w', encoding='utf-8') as f:
@@ -126,6 +295,9 @@ class DatabaseExpansionPipeline:
                 'pdf_affiliations': {}, 
                 'error': str(e)
             }
+        finally:
+            if cache is not None:
+                cache.close()
     
     def analyze_pdfs_and_search_pubmed_with_review(
         self, 
@@ -149,7 +321,7 @@ class DatabaseExpansionPipeline:
         os.makedirs(output_dir, exist_ok=True)
         
         # Step 1: Mine affiliations from PDFs
-        print("🔎 Step 1: Mining affiliations from PDFs...")
+        self.logger.info("🔎 Step 1: Mining affiliations from PDFs...")
         affiliations_output = os.path.join(output_dir, "discovered_affiliations.json")
         affiliation_results = self.mine_affiliations_from_pdfs(
             pdf_dir=pdf_dir,
@@ -160,9 +332,9 @@ class DatabaseExpansionPipeline:
         clusters = affiliation_results.get('affiliation_clusters', [])
         
         # Step 2: Manual review of affiliations
-        print("\n🔍 Step 2: Reviewing discovered affiliations...")
+        self.logger.info("🔍 Step 2: Reviewing discovered affiliations...")
         if not clusters:
-            print("⚠️ No affiliation clusters found.")
+            self.logger.warning("⚠️ No affiliation clusters found.")
             approved_variations = []
         else:
             # Extract clusters from results
@@ -171,44 +343,40 @@ class DatabaseExpansionPipeline:
         
         # Step 3: Format approved variations for PubMed search
         if not approved_variations:
-            print("⚠️ No affiliations approved. Using default affiliations for PubMed search.")
+            self.logger.warning("⚠️ No affiliations approved. Using default affiliations for PubMed search.")
             pubmed_variations = None  # Will use defaults in PubmedSearcher
         else:
-            import re
-            pubmed_variations = []
-            for variation in approved_variations:
-                # Clean and format for PubMed
-                clean_aff = re.sub(r'[,.:]', '', variation)
-                clean_aff = re.sub(r'\s+', ' ', clean_aff).strip()
-                pubmed_variation = f"{clean_aff}[Affiliation]"
-                pubmed_variations.append(pubmed_variation)
+            # Clean and format for PubMed
+            pubmed_variations = [
+                f"{_clean_affiliation(variation)}[Affiliation]" for variation in approved_variations
+            ]
         
-            print(f"🔍 Generated {len(pubmed_variations)} PubMed search variations")
-            print("\nSample variations:")
+            self.logger.info(f"🔍 Generated {len(pubmed_variations)} PubMed search variations")
+            self.logger.info("Sample variations:")
             for i, var in enumerate(pubmed_variations[:5]):
-                print(f"   {i+1}. {var}")
+                self.logger.info(f"   {i+1}. {var}")
         
         # Step 4: Search PubMed with approved affiliations
-        print("\n🔍 Step 4: Searching PubMed with approved affiliations...")
+        self.logger.info("🔍 Step 4: Searching PubMed with approved affiliations...")
         articles = self.pubmed_searcher.comprehensive_search(
             affiliation_variations=pubmed_variations,
             max_per_query=max_results_per_query
         )
         
         # Step 5: Save PubMed results
-        print(f"\n📊 Found {len(articles)} articles from PubMed")
+        self.logger.info(f"📊 Found {len(articles)} articles from PubMed")
         pubmed_output = os.path.join(output_dir, "pubmed_results.json")
         with open(pubmed_output, 'w', encoding='utf-8') as f:
             json.dump(articles, f, indent=2, ensure_ascii=False)
-        print(f"✅ PubMed results saved to {pubmed_output}")
+        self.logger.info(f"✅ PubMed results saved to {pubmed_output}")
         
         # Step 6: Summary
-        print("\n📋 Pipeline Summary:")
-        print(f"   PDFs processed: {affiliation_results['total_pdfs_processed']}")
-        print(f"   Unique affiliations found: {affiliation_results['total_affiliations_found']}")
-        print(f"   Affiliation clusters reviewed: {len(clusters)}")
-        print(f"   Approved variations: {len(approved_variations)}")
-        print(f"   PubMed articles found: {len(articles)}")
+        self.logger.info("📋 Pipeline Summary:")
+        self.logger.info(f"   PDFs processed: {affiliation_results['total_pdfs_processed']}")
+        self.logger.info(f"   Unique affiliations found: {affiliation_results['total_affiliations_found']}")
+        self.logger.info(f"   Affiliation clusters reviewed: {len(clusters)}")
+        self.logger.info(f"   Approved variations: {len(approved_variations)}")
+        self.logger.info(f"   PubMed articles found: {len(articles)}")
         
         return {
             'affiliation_results': affiliation_results,
@@ -233,15 +401,15 @@ class DatabaseExpansionPipeline:
         Returns:
             tuple: (final_database, pipeline_report)
         """
-        print("🚀 Starting complete publication database expansion pipeline\n")
+        self.logger.info("🚀 Starting complete publication database expansion pipeline")
         
         # Step 1: Load existing data
-        print("📂 Step 1: Loading existing publications")
+        self.logger.info("📂 Step 1: Loading existing publications")
         existing_pubs = self.database.load_publications(initial_json_path)
-        print(f"   Loaded {len(existing_pubs)} existing publications")
+        self.logger.info(f"   Loaded {len(existing_pubs)} existing publications")
         
         # Step 2: Mine affiliations from PDFs and review
-        print("\n🔍 Step 2: Mining and reviewing affiliations from PDFs")
+        self.logger.info("🔍 Step 2: Mining and reviewing affiliations from PDFs")
         review_results = self.analyze_pdfs_and_search_pubmed_with_review(
             pdf_dir=pdf_dir,
             output_dir=os.path.join(output_dir, 'affiliations'),
@@ -249,28 +417,28 @@ class DatabaseExpansionPipeline:
         )
         
         new_articles = review_results.get('pubmed_articles', [])
-        print(f"   Found {len(new_articles)} potential new articles")
+        self.logger.info(f"   Found {len(new_articles)} potential new articles")
         
         # Step 3: Merge databases
-        print("\n🔄 Step 3: Merging and deduplicating databases")
+        self.logger.info("🔄 Step 3: Merging and deduplicating databases")
         expanded_json_path = os.path.join(output_dir, 'expanded_ifc_publications.json')
         final_db = self.database.merge_publication_databases(existing_pubs, new_articles, expanded_json_path)
 
         # Step 4: Create final BibTeX
-        print("\n📚 Step 4: Creating final BibTeX file")
+        self.logger.info("📚 Step 4: Creating final BibTeX file")
         final_bibtex_path = os.path.join(output_dir, 'final_ifc_publications.bib')
         self.bibtex_manager.create_bibtex_from_publications(final_db, final_bibtex_path)
         
         # Step 5: Generate summary report
-        print("\n📊 Step 5: Generating summary report")
+        self.logger.info("📊 Step 5: Generating summary report")
         report = self.database.generate_summary_report(
             len(existing_pubs), final_db, new_articles, output_dir
         )
         
-        print(f"\n✅ Pipeline complete! Summary:")
-        print(f"   📊 Original: {report['original_count']} publications")
-        print(f"   🆕 Added: {report['new_additions']} new publications")
-        print(f"   📈 Final: {report['final_count']} total publications")
+        self.logger.info(f"✅ Pipeline complete! Summary:")
+        self.logger.info(f"   📊 Original: {report['original_count']} publications")
+        self.logger.info(f"   🆕 Added: {report['new_additions']} new publications")
+        self.logger.info(f"   📈 Final: {report['final_count']} total publications")
         
         return final_db, report
     
@@ -9,6 +9,11 @@ from bibtexparser.bwriter import BibTexWriter
 from bibtexparser.bibdatabase import BibDatabase
 
 
+# Patterns used while formatting authors and building citation keys
+_INITIAL_RE = re.compile(r'^[A-Z]\.?$')
+_NON_ALPHA_RE = re.compile(r'[^a-zA-Z]')
+
+
 class BibTexManager:
     """Manages BibTeX file creation and manipulation."""
     
@@ -41,7 +46,7 @@ class BibTexManager:
                 next_item = authors[i + 1].strip()
                 if (len(next_item) <= 3 or 
                     (len(next_item.split()) == 1 and '.' in next_item) or
-                    re.match(r'^[A-Z]\.?$', next_item)):
+                    _INITIAL_RE.match(next_item)):
                     # This is likely a first name/initial
                     last_name = authors[i].strip()
                     first_name = next_item
@@ -71,7 +76,7 @@ class BibTexManager:
             str: Citation key
         """
         first_author = pub['authors'].split(',')[0].strip() if pub['authors'] else 'Unknown'
-        first_author_clean = re.sub(r'[^a-zA-Z]', '', first_author)
+        first_author_clean = _NON_ALPHA_RE.sub('', first_author)
         citation_key = f"{first_author_clean}{pub['year']}_ifc_{index}"
         return citation_key
     
@@ -124,20 +129,13 @@ class BibTexManager:
         Returns:
             str: Path to created BibTeX file
         """
-        db = BibDatabase()
-        entries = []
-        
-        for i, pub in enumerate(publications):
-            entry = self.publication_to_bibtex_entry(pub, i)
-            entries.append(entry)
-        
-        db.entries = entries
+        entries = [self.publication_to_bibtex_entry(pub, i) for i, pub in enumerate(publications)]
         
         # Write to file
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(self.writer.write(db))
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            self._write_entries(entries, f)
         
         print(f"📚 Created BibTeX file with {len(entries)} entries: {output_file}")
         print("Import this file into Zotero to download PDFs automatically")
@@ -150,6 +148,26 @@ class BibTexManager:
         
         return output_file
     
+    def _write_entries(self, entries: List[Dict[str, Any]], f) -> None:
+        """
+        Write entries to a file one at a time, as BibTexWriter.write would format them.
+        
+        Avoids building the whole BibTeX document as one string in memory.
+        
+        Args:
+            entries: BibTeX entries
+            f: Text file opened for writing
+        """
+        if self.writer.order_entries_by:
+            entries = sorted(
+                entries, key=lambda entry: BibDatabase.entry_sort_key(entry, self.writer.order_entries_by)
+            )
+        
+        for i, entry in enumerate(entries):
+            if i:
+                f.write(self.writer.entry_separator)
+            f.write(self.writer._entry_to_bibtex(entry))
+    
     def load_bibtex_file(self, bibtex_path: str) -> List[Dict[str, Any]]:
         """
         Load and parse a BibTeX file.
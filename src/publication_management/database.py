@@ -1,10 +1,146 @@
 """Database management for publications."""
 
 import os
+import re
 import json
 import time
-from typing import List, Dict, Any, Set, Tuple
-from collections import Counter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from tqdm import tqdm
+
+try:
+    import orjson  # Optional, faster JSON serialization
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
+
+# Use absolute imports that work when imported into notebooks
+try:
+    from data_quality.keywords import extract_keywords
+except ImportError:
+    # Fallback to relative imports for package installation
+    from ..data_quality.keywords import extract_keywords
+
+
+def _dump_json(data: Any, path: str) -> None:
+    """Write indented UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+@lru_cache(maxsize=8192)
+def _cached_keywords(text: str) -> Tuple[str, ...]:
+    """Keywords for a text, memoized since merges often see repeated abstracts."""
+    return tuple(extract_keywords(text))
+
+
+@lru_cache(maxsize=65536)
+def _normalize_title(title: str) -> str:
+    """Lower-cased, stripped title, memoized since merges see the same titles repeatedly."""
+    return title.lower().strip()
+
+
+def _title_key(pub: Dict[str, Any]) -> str:
+    """
+    Normalized title used for duplicate checks.
+    
+    Always derived from the current title (never stored on the publication),
+    so editing a title can't leave a stale key behind.
+    """
+    return _normalize_title(pub.get('title') or '')
+
+
+def _doi_key(doi: str) -> str:
+    """Normalize a DOI for duplicate checks (DOIs are case-insensitive)."""
+    doi = doi.strip().lower()
+    for prefix in ('https://doi.org/', 'http://doi.org/', 'doi:'):
+        if doi.startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+
+# Fuzzy title matching (only used when rapidfuzz is installed): a title counts as a
+# duplicate at this token_set_ratio if the year matches and an author name is shared
+_FUZZY_TITLE_CUTOFF = 95
+_FUZZY_MIN_TITLE_WORDS = 4
+_NAME_TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+
+
+def _author_names(authors: Any) -> Set[str]:
+    """Lower-cased name tokens (initials dropped) from an author string or list."""
+    if not authors:
+        return set()
+    if not isinstance(authors, str):
+        authors = ' '.join(str(author) for author in authors)
+    return set(_NAME_TOKEN_RE.findall(authors.lower()))
+
+
+class FuzzyTitleIndex:
+    """Publications grouped by year for fuzzy duplicate-title lookups."""
+    
+    def __init__(self, publications: Iterable[Dict[str, Any]] = ()):
+        """
+        Index publications by year.
+        
+        Args:
+            publications: Publications to index
+        """
+        self._titles = defaultdict(list)
+        self._authors = defaultdict(list)
+        for pub in publications:
+            self.add(pub.get('title'), pub.get('year'), pub.get('authors'))
+    
+    def add(self, title: str, year: Any, authors: Any) -> None:
+        """Add one publication to the index (ignored without a title and year)."""
+        if title and year:
+            self._titles[str(year)].append(title.lower().strip())
+            self._authors[str(year)].append(_author_names(authors))
+    
+    def contains(self, title: str, year: Any, authors: Any) -> bool:
+        """
+        Check for a near-identical title from the same year sharing an author.
+        
+        Args:
+            title: Title of the candidate publication
+            year: Publication year
+            authors: Author string or list
+            
+        Returns:
+            bool: True if a fuzzy duplicate is indexed
+        """
+        if not title or not year or len(title.split()) < _FUZZY_MIN_TITLE_WORDS:
+            # token_set_ratio scores any subset as 100, so short titles match too easily
+            return False
+        
+        choices = self._titles.get(str(year))
+        if not choices:
+            return False
+        
+        names = _author_names(authors)
+        if not names:
+            return False
+        
+        matches = process.extract(
+            title.lower().strip(), choices, scorer=fuzz.token_set_ratio,
+            score_cutoff=_FUZZY_TITLE_CUTOFF, limit=5
+        )
+        year_authors = self._authors[str(year)]
+        return any(names & year_authors[index] for _, _, index in matches)
 
 
 class PublicationDatabase:
@@ -24,50 +160,110 @@ class PublicationDatabase:
         Returns:
             dict: Index structures
         """
-        indexes = {
-            'doi': {},
-            'pmid': {},
-            'title_lower': {},
-            'year': {},
-            'journal': {}
-        }
+        doi_index = {}
+        pmid_index = {}
+        title_index = {}
+        year_index = defaultdict(list)
+        journal_index = defaultdict(list)
         
+        # Single pass, reading each field once per publication
         for i, pub in enumerate(publications):
-            if pub.get('doi'):
-                indexes['doi'][pub['doi']] = i
-            if pub.get('pubmed_id'):
-                indexes['pmid'][pub['pubmed_id']] = i
+            doi = pub.get('doi')
+            if doi:
+                doi_index[doi] = i
+            pmid = pub.get('pubmed_id')
+            if pmid:
+                pmid_index[pmid] = i
             if pub.get('title'):
-                indexes['title_lower'][pub['title'].lower().strip()] = i
-            if pub.get('year'):
-                year = pub['year']
-                if year not in indexes['year']:
-                    indexes['year'][year] = []
-                indexes['year'][year].append(i)
-            if pub.get('journal'):
-                journal = pub['journal']
-                if journal not in indexes['journal']:
-                    indexes['journal'][journal] = []
-                indexes['journal'][journal].append(i)
-        
-        return indexes
+                title_index[_title_key(pub)] = i
+            year = pub.get('year')
+            if year:
+                year_index[year].append(i)
+            journal = pub.get('journal')
+            if journal:
+                journal_index[journal].append(i)
+        
+        return {
+            'doi': doi_index,
+            'pmid': pmid_index,
+            'title_lower': title_index,
+            'year': dict(year_index),
+            'journal': dict(journal_index)
+        }
     
-    def create_lookup_sets(self, existing_pubs: List[Dict[str, Any]]) -> Tuple[Set[str], Set[str], Set[str]]:
+    def create_lookup_sets(self, existing_pubs: Iterable[Dict[str, Any]]) -> Tuple[Set[str], Set[str], Set[str]]:
         """
         Create lookup sets for deduplication.
         
         Args:
-            existing_pubs: List of existing publications
+            existing_pubs: Existing publications (any iterable, e.g. iter_publications)
             
         Returns:
             tuple: (DOIs, PMIDs, titles) as sets
         """
-        existing_dois = {pub.get('doi') for pub in existing_pubs if pub.get('doi')}
-        existing_pmids = {pub.get('pubmed_id') for pub in existing_pubs if pub.get('pubmed_id')}
-        existing_titles = {pub.get('title', '').lower().strip() for pub in existing_pubs if pub.get('title')}
+        existing_dois = set()
+        existing_pmids = set()
+        existing_titles = set()
+        
+        # One pass fills all three sets, so a streamed iterator works too
+        for pub in existing_pubs:
+            doi = pub.get('doi')
+            if doi:
+                existing_dois.add(_doi_key(doi))
+            pmid = pub.get('pubmed_id')
+            if pmid:
+                existing_pmids.add(pmid)
+            if pub.get('title'):
+                existing_titles.add(_title_key(pub))
         
         return existing_dois, existing_pmids, existing_titles
     
+    @staticmethod
+    def _duplicate_reason(
+        pub: Dict[str, Any], 
+        existing_dois: Set[str], 
+        existing_pmids: Set[str], 
+        existing_titles: Set[str], 
+        fuzzy_index: Optional[FuzzyTitleIndex]
+    ) -> Optional[str]:
+        """
+        Check a candidate publication against the known ones.
+        
+        Shared by merge_publication_databases and test_merge_effectiveness so
+        the dry run predicts exactly what the merge will drop.
+        
+        Returns:
+            str or None: 'doi', 'pmid', 'title' or 'fuzzy_title', or None if new
+        """
+        if pub.get('doi') and _doi_key(pub['doi']) in existing_dois:
+            return 'doi'
+        if pub.get('pmid') and pub['pmid'] in existing_pmids:
+            return 'pmid'
+        if pub.get('title') and _title_key(pub) in existing_titles:
+            return 'title'
+        if fuzzy_index is not None and fuzzy_index.contains(
+                pub.get('title'), pub.get('year'), pub.get('authors')):
+            return 'fuzzy_title'
+        return None
+    
+    @staticmethod
+    def _track_publication(
+        pub: Dict[str, Any], 
+        existing_dois: Set[str], 
+        existing_pmids: Set[str], 
+        existing_titles: Set[str], 
+        fuzzy_index: Optional[FuzzyTitleIndex]
+    ) -> None:
+        """Add an accepted publication to the lookup structures."""
+        if pub.get('doi'):
+            existing_dois.add(_doi_key(pub['doi']))
+        if pub.get('pmid'):
+            existing_pmids.add(pub['pmid'])
+        if pub.get('title'):
+            existing_titles.add(_title_key(pub))
+        if fuzzy_index is not None:
+            fuzzy_index.add(pub.get('title'), pub.get('year'), pub.get('authors'))
+    
     def convert_pubmed_to_publication_format(self, pubmed_pub: Dict[str, Any]) -> Dict[str, Any]:
         """
         Convert PubMed format to internal publication format.
@@ -78,12 +274,7 @@ class PublicationDatabase:
         Returns:
             dict: Converted publication dictionary
         """
-        # Import here to avoid circular imports
-        try:
-            from data_quality.keywords import extract_keywords
-        except ImportError:
-            from ..data_quality.keywords import extract_keywords
-        
+        embedding_text = pubmed_pub.get('abstract', '') + " " + pubmed_pub.get('title', '')
         converted_pub = {
             'title': pubmed_pub.get('title', ''),
             'authors': pubmed_pub.get('authors', ''),
@@ -94,8 +285,8 @@ class PublicationDatabase:
             'ifc_url': None,  # Not available from PubMed
             'abstract': pubmed_pub.get('abstract', ''),
             'keywords': None,
-            'embedding_text': pubmed_pub.get('abstract', '') + " " + pubmed_pub.get('title', ''),
-            'keywords_extracted': extract_keywords(pubmed_pub.get('abstract', '') + " " + pubmed_pub.get('title', '')),
+            'embedding_text': embedding_text,
+            'keywords_extracted': list(_cached_keywords(embedding_text)),
             'metadata': {
                 'source': 'PubMed_search',
                 'has_full_text': False,
@@ -125,36 +316,27 @@ class PublicationDatabase:
         # Create lookup sets for deduplication
         existing_dois, existing_pmids, existing_titles = self.create_lookup_sets(existing_pubs)
         
-        merged_pubs = existing_pubs.copy()
-        new_count = 0
+        # Second, fuzzy pass for title variants the exact checks miss
+        fuzzy_index = FuzzyTitleIndex(existing_pubs) if process is not None else None
+        
+        added_pubs = []
         
         print(f"Processing {len(new_pubs)} potential new publications...")
         
+        lookups = (existing_dois, existing_pmids, existing_titles, fuzzy_index)
         for pub in new_pubs:
-            is_duplicate = False
-            
-            # Check for duplicates
-            if pub.get('doi') and pub['doi'] in existing_dois:
-                is_duplicate = True
-            elif pub.get('pmid') and pub['pmid'] in existing_pmids:
-                is_duplicate = True
-            elif pub.get('title', '').lower().strip() in existing_titles:
-                is_duplicate = True
-                
-            if not is_duplicate:
+            # Check for duplicates (set lookups keep the merge linear)
+            if self._duplicate_reason(pub, *lookups) is None:
                 # Convert PubMed format to internal format
                 converted_pub = self.convert_pubmed_to_publication_format(pub)
-                merged_pubs.append(converted_pub)
-                new_count += 1
+                added_pubs.append(converted_pub)
                 
                 # Update tracking sets
-                if pub.get('doi'):
-                    existing_dois.add(pub['doi'])
-                if pub.get('pmid'):
-                    existing_pmids.add(pub['pmid'])
-                existing_titles.add(pub.get('title', '').lower().strip())
+                self._track_publication(pub, *lookups)
         
-        # Save expanded database
+        # Save expanded database (built once, at its final size)
+        merged_pubs = [*existing_pubs, *added_pubs]
+        new_count = len(added_pubs)
         self.save_publications(merged_pubs, output_file)
         
         print(f"\n📊 Database expansion complete:")
@@ -174,8 +356,7 @@ class PublicationDatabase:
             output_file: Output file path
         """
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(publications, f, indent=2, ensure_ascii=False)
+        _dump_json(publications, output_file)
     
     def load_publications(self, file_path: str) -> List[Dict[str, Any]]:
         """
@@ -187,10 +368,35 @@ class PublicationDatabase:
         Returns:
             list: List of publication dictionaries
         """
+        if orjson is not None:
+            with open(file_path, 'rb') as f:
+                return orjson.loads(f.read())
+        
         with open(file_path, 'r', encoding='utf-8') as f:
             publications = json.load(f)
         return publications
     
+    def iter_publications(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the publications in a JSON file one at a time.
+        
+        With ijson installed the file is parsed incrementally, so single-pass
+        consumers don't need the whole database in memory. Otherwise this falls
+        back to load_publications.
+        
+        Args:
+            file_path: Path to JSON file
+            
+        Yields:
+            dict: Publication dictionaries, in file order
+        """
+        if ijson is None:
+            yield from self.load_publications(file_path)
+            return
+        
+        with open(file_path, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+    
     def test_merge_effectiveness(
         self, 
         existing_pubs: List[Dict[str, Any]], 
@@ -208,45 +414,34 @@ class PublicationDatabase:
         """
         print("   Building lookup tables for faster matching...")
         existing_dois, existing_pmids, existing_titles = self.create_lookup_sets(existing_pubs)
+        # Same fuzzy pass as merge_publication_databases
+        fuzzy_index = FuzzyTitleIndex(existing_pubs) if process is not None else None
+        lookups = (existing_dois, existing_pmids, existing_titles, fuzzy_index)
         
         # Analyze new publications
         new_count = 0
         duplicate_by_doi = 0
         duplicate_by_pmid = 0
         duplicate_by_title = 0
+        duplicate_by_fuzzy_title = 0
         truly_new = []
         
-        # Process with progress indicator
+        # Process with progress indicator (tqdm throttles its own redraws)
         print("\n   Processing publications:")
-        total_new = len(new_pubs)
-        update_interval = max(1, min(100, total_new // 10))
-        
-        for i, pub in enumerate(new_pubs):
-            # Show progress periodically
-            if i % update_interval == 0 or i == total_new - 1:
-                progress = (i + 1) / total_new * 100
-                print(f"   Progress: {i+1}/{total_new} ({progress:.1f}%)", end="\r")
-            
-            is_duplicate = False
-            duplicate_reason = ""
-            
+        
+        for pub in tqdm(new_pubs, desc="   Checking duplicates"):
             # Check for duplicates with detailed tracking
-            if pub.get('doi') and pub['doi'] in existing_dois:
-                is_duplicate = True
-                duplicate_reason = "DOI match"
+            duplicate_reason = self._duplicate_reason(pub, *lookups)
+            if duplicate_reason == 'doi':
                 duplicate_by_doi += 1
-            elif pub.get('pmid') and pub['pmid'] in existing_pmids:
-                is_duplicate = True
-                duplicate_reason = "PMID match"
+            elif duplicate_reason == 'pmid':
                 duplicate_by_pmid += 1
-            elif pub.get('title'):
-                title_lower = pub.get('title', '').lower().strip()
-                if title_lower in existing_titles:
-                    is_duplicate = True
-                    duplicate_reason = "Title match"
-                    duplicate_by_title += 1
+            elif duplicate_reason == 'title':
+                duplicate_by_title += 1
+            elif duplicate_reason == 'fuzzy_title':
+                duplicate_by_fuzzy_title += 1
                 
-            if not is_duplicate:
+            if duplicate_reason is None:
                 # This is a new publication
                 truly_new.append({
                     'title': pub.get('title', ''),
@@ -259,8 +454,11 @@ class PublicationDatabase:
                     'source': 'PubMed_search'
                 })
                 new_count += 1
+                
+                # Later candidates are checked against this one, as in the merge
+                self._track_publication(pub, *lookups)
         
-        print("\n   Processing complete!                           ")  # Clear progress line
+        print("   Processing complete!")
         
         return {
             'total_found': len(new_pubs),
@@ -270,6 +468,7 @@ class PublicationDatabase:
                 'by_doi': duplicate_by_doi,
                 'by_pmid': duplicate_by_pmid,
                 'by_title': duplicate_by_title,
+                'by_fuzzy_title': duplicate_by_fuzzy_title,
                 'total': len(new_pubs) - new_count
             }
         }
@@ -303,19 +502,22 @@ class PublicationDatabase:
             'top_journals': {}
         }
         
-        # Analyze year distribution
-        years = [pub.get('year') for pub in final_publications if pub.get('year')]
-        year_counts = Counter(years)
-        report['year_distribution'] = dict(year_counts.most_common(10))
+        # Analyze year distribution and top journals in one pass
+        year_counts = Counter()
+        journal_counts = Counter()
+        for pub in final_publications:
+            year = pub.get('year')
+            if year:
+                year_counts[year] += 1
+            journal = pub.get('journal')
+            if journal:
+                journal_counts[journal] += 1
         
-        # Analyze top journals
-        journals = [pub.get('journal') for pub in final_publications if pub.get('journal')]
-        journal_counts = Counter(journals)
+        report['year_distribution'] = dict(year_counts.most_common(10))
         report['top_journals'] = dict(journal_counts.most_common(10))
         
         # Save report
         report_path = os.path.join(output_dir, 'pipeline_report.json')
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        _dump_json(report, report_path)
         
         return report
\ No newline at end of file
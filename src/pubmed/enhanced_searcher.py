@@ -1,11 +1,18 @@
 """Enhanced PubMed searcher with comprehensive search capabilities."""
 
+import re
 import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from .xml_parser import PubmedXMLParser
 
 
+# Terms an affiliation variation must contain to be specific to the institute
+_AFF_KEYWORDS_RE = re.compile(r'fisiol|physiol|mexico|unam|ifc|cellular')
+
+
 class EnhancedPubmedSearcher:
     """Enhanced PubMed searcher with comprehensive query building and XML parsing."""
     
@@ -14,6 +21,18 @@ class EnhancedPubmedSearcher:
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
         self.xml_parser = PubmedXMLParser()
         
+        # One session keeps the connection to NCBI alive across esearch/efetch calls
+        # (requests already asks for gzip-compressed responses)
+        self.session = requests.Session()
+        self.timeout = 30
+        self.fetch_batch_size = 200
+        
+        # NCBI allows 3 requests per second without an API key; requests from
+        # all threads are spaced at least this far apart
+        self.min_request_interval = 0.34
+        self._rate_lock = threading.Lock()
+        self._next_request_time = 0.0
+        
     def build_search_queries(self, affiliation_variations: Optional[List[str]] = None) -> List[str]:
         """
         Build comprehensive search queries for different affiliation variations.
@@ -47,7 +66,7 @@ class EnhancedPubmedSearcher:
                 continue
             
             # Skip variations without key identifiers
-            if not any(term in check_var for term in ["fisiol", "physiol", "mexico", "unam", "ifc", "cellular"]):
+            if not _AFF_KEYWORDS_RE.search(check_var):
                 continue
                 
             filtered_variations.append(var)
@@ -67,6 +86,15 @@ class EnhancedPubmedSearcher:
         
         return queries
     
+    def _throttle(self) -> None:
+        """Block until another request may be sent under the NCBI rate limit."""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + self.min_request_interval
+        if wait > 0:
+            time.sleep(wait)
+    
     def search_pubmed(self, query: str, max_results: int = 100) -> List[Dict[str, Any]]:
         """
         Search PubMed with a given query.
@@ -88,7 +116,8 @@ class EnhancedPubmedSearcher:
         }
         
         try:
-            response = requests.get(search_url, params=search_params)
+            self._throttle()
+            response = self.session.get(search_url, params=search_params, timeout=self.timeout)
             search_data = response.json()
             
             pmids = search_data['esearchresult']['idlist']
@@ -99,20 +128,25 @@ class EnhancedPubmedSearcher:
             if not pmids:
                 return []
             
-            # Step 2: Fetch details
-            time.sleep(0.5)  # Rate limiting
-            
+            # Step 2: Fetch details, in POSTed batches so large ID lists stay
+            # within NCBI's limits and each response is parsed as it streams in
             fetch_url = f"{self.base_url}efetch.fcgi"
-            fetch_params = {
-                'db': 'pubmed',
-                'id': ','.join(pmids),
-                'retmode': 'xml'
-            }
-            
-            fetch_response = requests.get(fetch_url, params=fetch_params)
-            
-            # Parse XML using our parser
-            articles = self.xml_parser.parse_pubmed_xml(fetch_response.text)
+            articles = []
+            
+            for i in range(0, len(pmids), self.fetch_batch_size):
+                fetch_params = {
+                    'db': 'pubmed',
+                    'id': ','.join(pmids[i:i + self.fetch_batch_size]),
+                    'retmode': 'xml'
+                }
+                
+                self._throttle()
+                with self.session.post(fetch_url, data=fetch_params, timeout=self.timeout,
+                                       stream=True) as fetch_response:
+                    fetch_response.raw.decode_content = True
+                    
+                    # Parse XML using our parser
+                    articles.extend(self.xml_parser.parse_pubmed_xml_stream(fetch_response.raw))
             
             return articles
             
@@ -123,14 +157,19 @@ class EnhancedPubmedSearcher:
     def comprehensive_search(
         self, 
         affiliation_variations: Optional[List[str]] = None, 
-        max_per_query: int = 50
+        max_per_query: int = 50,
+        max_workers: int = 3
     ) -> List[Dict[str, Any]]:
         """
         Run comprehensive search with all query variations.
         
+        Queries run concurrently on a small thread pool; every request still goes
+        through the shared rate limiter.
+        
         Args:
             affiliation_variations: Optional list of affiliation variations to use
             max_per_query: Maximum results per query
+            max_workers: Number of queries in flight at once
         
         Returns:
             list: List of articles found
@@ -139,20 +178,20 @@ class EnhancedPubmedSearcher:
         all_articles = []
         seen_pmids = set()
         
-        for i, query in enumerate(queries):
-            print(f"\n🔍 Running search {i+1}/{len(queries)}")
-            articles = self.search_pubmed(query, max_per_query)
-            
-            # Deduplicate
-            new_articles = []
-            for article in articles:
-                if article['pmid'] not in seen_pmids:
-                    seen_pmids.add(article['pmid'])
-                    new_articles.append(article)
-            
-            all_articles.extend(new_articles)
-            print(f"Added {len(new_articles)} new articles (total: {len(all_articles)})")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(self.search_pubmed, query, max_per_query) for query in queries]
             
-            time.sleep(1)  # Be respectful to NCBI
-            
-        return all_articles
\ No newline at end of file
+            # Results are merged in query order so deduplication is deterministic
+            for i, future in enumerate(futures):
+                print(f"\n🔍 Search {i+1}/{len(queries)}")
+                articles = future.result()
+                
+                # Deduplicate (efetch returns each PMID once per query)
+                new_pmids = {article['pmid'] for article in articles} - seen_pmids
+                new_articles = [article for article in articles if article['pmid'] in new_pmids]
+                seen_pmids |= new_pmids
+                
+                all_articles.extend(new_articles)
+                print(f"Added {len(new_articles)} new articles (total: {len(all_articles)})")
+        
+        return all_articles
@@ -3,28 +3,60 @@ PubMed search and article retrieval
 """
 import asyncio
 import aiohttp
+import json
+import os
+import random
+import re
+import sqlite3
 import time
 import sys
-from typing import List, Dict, Optional
-from dataclasses import dataclass
-from xml.etree import ElementTree as ET
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, fields
 from urllib.parse import urlencode
-import pandas as pd
 from pathlib import Path
 
+try:
+    import orjson  # Optional, faster JSON serialization
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq  # Optional, Parquet article dumps
+except ImportError:
+    pa = pq = None
+
+try:
+    from lxml import etree as ET  # Optional, faster C XML parser
+except ImportError:
+    from xml.etree import ElementTree as ET
+
 # Handle both relative and absolute imports for notebook compatibility
 try:
     from ..utils.logger import get_logger
-    from ..utils.config import load_config
+    from ..utils.config import load_config, get_data_dir
+    from .xml_parser import collect_article_fields
 except ImportError:
     # Fallback for notebook/standalone usage
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent))
     from utils.logger import get_logger
-    from utils.config import load_config
+    from utils.config import load_config, get_data_dir
+    from pubmed.xml_parser import collect_article_fields
+
+
+# PMIDs in an esearch response; the flat <IdList> doesn't need a full DOM
+_ESEARCH_ID_RE = re.compile(rb'<Id>(\d+)</Id>')
+
+# Statuses NCBI returns for transient overload or rate limiting; worth retrying
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
 
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class PubMedArticle:
     """Data class for PubMed article information"""
     pmid: str
@@ -37,6 +69,123 @@ class PubMedArticle:
     keywords: Optional[List[str]] = None
     mesh_terms: Optional[List[str]] = None
     similarity_score: Optional[float] = None
+    
+    def to_dict(self) -> Dict:
+        """Shallow dict of the article fields (list fields are shared, not copied)"""
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+def parse_article_details_bytes(xml_content: bytes) -> List[PubMedArticle]:
+    """
+    Parse an efetch XML response into articles.
+    
+    Module-level, so worker processes can run it; the returned dataclasses
+    are cheap to send back.
+    
+    Args:
+        xml_content: Raw efetch response (bytes, as lxml requires for encoded XML)
+        
+    Returns:
+        List of PubMedArticle objects (those parsed before any XML error)
+    """
+    articles = []
+    parser = ET.XMLPullParser(events=('end',))
+    
+    try:
+        parser.feed(xml_content)
+        # Collect before close(), so articles completed ahead of a
+        # truncated or malformed tail are kept
+        _collect_parsed_articles(parser, articles)
+        parser.close()
+        _collect_parsed_articles(parser, articles)
+    except ET.ParseError as e:
+        get_logger(__name__).error(f"Error parsing article details XML: {e}")
+        # Keep whatever was completed before the error
+        try:
+            _collect_parsed_articles(parser, articles)
+        except ET.ParseError:
+            pass
+    
+    return articles
+
+
+def _collect_parsed_articles(parser, articles: List[PubMedArticle]) -> None:
+    """Parse the PubmedArticle elements a pull parser has completed, then free them"""
+    for _, elem in parser.read_events():
+        if elem.tag != 'PubmedArticle':
+            continue
+        article = _parse_single_article(elem)
+        if article:
+            articles.append(article)
+        elem.clear()
+
+
+def _parse_single_article(article_elem) -> Optional[PubMedArticle]:
+    """Parse a single article from XML"""
+    # One shared walk over the article collects every field
+    fields = collect_article_fields(article_elem)
+    
+    # Extract PMID
+    pmid_elem = fields['pmid']
+    if pmid_elem is None:
+        return None
+    pmid = pmid_elem.text
+    
+    # Extract title
+    title_elem = fields['title']
+    title = title_elem.text if title_elem is not None else ""
+    
+    # Extract authors as "First Last"
+    authors = []
+    for lastname, firstname in fields['authors']:
+        author_name = lastname.text or ""
+        if firstname is not None and firstname.text:
+            author_name = f"{firstname.text} {author_name}"
+        authors.append(author_name)
+    
+    # Extract abstract
+    abstract = " ".join(fields['abstract_texts'])
+    
+    # Extract journal
+    journal_elem = fields['journal']
+    journal = journal_elem.text if journal_elem is not None else ""
+    
+    # Extract publication date
+    pub_date = ""
+    pub_date_elem = fields['pub_date']
+    if pub_date_elem is not None:
+        # One pass over the few PubDate children instead of a find() per part
+        date_parts = {}
+        for child in pub_date_elem:
+            date_parts.setdefault(child.tag, child)
+        year_elem = date_parts.get('Year')
+        month_elem = date_parts.get('Month')
+        day_elem = date_parts.get('Day')
+        
+        if year_elem is not None:
+            pub_date = year_elem.text or ""
+            if month_elem is not None:
+                pub_date += f"-{month_elem.text or '01'}"
+                if day_elem is not None:
+                    pub_date += f"-{day_elem.text or '01'}"
+        elif 'MedlineDate' in date_parts:
+            # Free-text dates such as "1998 Dec-1999 Jan" have no Year element
+            pub_date = date_parts['MedlineDate'].text or ""
+    
+    # Extract DOI
+    doi_elem = fields['article_id_doi']
+    doi = doi_elem.text if doi_elem is not None else None
+    
+    return PubMedArticle(
+        pmid=pmid,
+        title=title,
+        abstract=abstract,
+        authors=authors,
+        journal=journal,
+        publication_date=pub_date,
+        doi=doi,
+        mesh_terms=fields['mesh_terms']
+    )
 
 
 class PubMedSearcher:
@@ -49,6 +198,10 @@ class PubMedSearcher:
         self.email = self.config['pubmed']['email']
         self.api_key = self.config['pubmed'].get('api_key', '')
         self.rate_limit_delay = self.config['pubmed']['rate_limit_delay']
+        # NCBI allows 10 requests/s with an API key and 3 without
+        self.max_concurrent_requests = self.config['pubmed'].get(
+            'max_concurrent_requests', 10 if self.api_key else 3
+        )
         
         # Use config value if not explicitly set
         if use_pymed is None:
@@ -66,6 +219,137 @@ class PubMedSearcher:
                 self.logger.warning("PyMed not installed, falling back to direct API")
                 self.use_pymed = False
         
+        # Persistent cache of fetched article details, keyed by PMID
+        cache_config = self.config['pubmed'].get('cache') or {}
+        self.cache = None
+        if cache_config.get('enabled', False):
+            self.cache = self._open_cache(cache_config.get('ttl_days', 90))
+        
+        # PMIDs per efetch request
+        self.fetch_batch_size = self.config['pubmed'].get('fetch_batch_size', 500)
+        
+        # efetch parameters shared by every batch
+        self._efetch_params = {
+            'db': 'pubmed',
+            'retmode': 'xml',
+            'tool': 'ubmi-ifc-podcast',
+            'email': self.email
+        }
+        if self.api_key:
+            self._efetch_params['api_key'] = self.api_key
+        
+        # Worker processes used to parse efetch responses when fetching several batches
+        self.parse_workers = self.config['pubmed'].get(
+            'parse_workers', min(4, os.cpu_count() or 1)
+        )
+        
+        # HTTP session shared by all E-utilities requests, created on first use
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def __aenter__(self) -> "PubMedSearcher":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, so connections to NCBI are kept alive between requests"""
+        if self._session is None or self._session.closed:
+            # aiohttp decompresses gzip/deflate bodies itself; asking for them
+            # explicitly keeps multi-MB efetch responses small on the wire
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+                headers={
+                    'Accept-Encoding': 'gzip, deflate',
+                    'User-Agent': 'ubmi-ifc-podcast/1.0'
+                }
+            )
+        return self._session
+    
+    async def _request_with_retry(self, method: str, url: str, max_attempts: int = 5,
+                                  **kwargs) -> Tuple[int, bytes]:
+        """
+        Send a request, retrying transient failures with exponential backoff
+        
+        Rate-limit and server errors (honouring Retry-After) and connection
+        errors are retried; the last connection error is re-raised.
+        
+        Returns:
+            Tuple of (final status, body); the body is empty unless the status is 200
+        """
+        session = await self._get_session()
+        endpoint = url.split('?', 1)[0]  # for logging, without the api_key
+        
+        for attempt in range(max_attempts):
+            last_attempt = attempt == max_attempts - 1
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status == 200:
+                        self.logger.debug(
+                            f"{endpoint} Content-Encoding: {response.headers.get('Content-Encoding', 'identity')}"
+                        )
+                        return response.status, await response.read()
+                    if response.status not in _RETRY_STATUSES or last_attempt:
+                        return response.status, b""
+                    retry_after = response.headers.get('Retry-After')
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    raise
+                retry_after = None
+                status = e
+            
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = 2 ** attempt
+            delay += random.random()
+            self.logger.warning(f"{endpoint} failed ({status}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _open_cache(self, ttl_days: float) -> sqlite3.Connection:
+        """Open the PMID -> article cache and purge entries older than ``ttl_days``"""
+        cache_dir = get_data_dir() / "cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        cache = sqlite3.connect(str(cache_dir / "pubmed.db"))
+        cache.execute("PRAGMA journal_mode=WAL")
+        cache.execute(
+            "CREATE TABLE IF NOT EXISTS articles (pmid TEXT PRIMARY KEY, data TEXT, fetched_at REAL)"
+        )
+        cache.execute("DELETE FROM articles WHERE fetched_at < ?", (time.time() - ttl_days * 86400,))
+        cache.commit()
+        return cache
+    
+    def _load_cached_articles(self, pmids: List[str]) -> Dict[str, PubMedArticle]:
+        """Return the cached articles among ``pmids``"""
+        cached = {}
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(pmids), 500):
+            batch = pmids[i:i + 500]
+            rows = self.cache.execute(
+                f"SELECT pmid, data FROM articles WHERE pmid IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for pmid, data in rows:
+                cached[pmid] = PubMedArticle(**json.loads(data))
+        return cached
+    
+    def _store_cached_articles(self, articles: List[PubMedArticle]) -> None:
+        """Add freshly fetched articles to the cache"""
+        now = time.time()
+        self.cache.executemany(
+            "INSERT OR REPLACE INTO articles (pmid, data, fetched_at) VALUES (?, ?, ?)",
+            [(article.pmid, json.dumps(asdict(article), ensure_ascii=False), now) for article in articles]
+        )
+        self.cache.commit()
+        
     async def search_recent_articles(self, 
                                    query_terms: List[str] = None,
                                    days_back: int = 7,
@@ -138,23 +422,26 @@ class PubMedSearcher:
         
         url = f"{self.base_url}esearch.fcgi?" + urlencode(params)
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        xml_content = await response.text()
-                        pmids = self._parse_search_results(xml_content)
-                        self.logger.info(f"Found {len(pmids)} articles with direct API")
-                        return pmids[:max_results]
-                    else:
-                        self.logger.error(f"PubMed search failed with status {response.status}")
-                        return []
-            except Exception as e:
-                self.logger.error(f"Error searching PubMed: {str(e)}")
+        try:
+            status, xml_content = await self._request_with_retry('GET', url)
+            if status == 200:
+                pmids = self._parse_search_results(xml_content)
+                self.logger.info(f"Found {len(pmids)} articles with direct API")
+                return pmids[:max_results]
+            else:
+                self.logger.error(f"PubMed search failed with status {status}")
                 return []
+        except Exception as e:
+            self.logger.error(f"Error searching PubMed: {str(e)}")
+            return []
     
-    def _parse_search_results(self, xml_content: str) -> List[str]:
+    def _parse_search_results(self, xml_content: bytes) -> List[str]:
         """Parse XML search results to extract PMIDs"""
+        pmids = _ESEARCH_ID_RE.findall(xml_content)
+        if pmids:
+            return [pmid.decode('ascii') for pmid in pmids]
+        
+        # No plain <Id> elements: parse properly to tell empty results from errors
         try:
             root = ET.fromstring(xml_content)
             id_list = root.find('.//IdList')
@@ -168,6 +455,15 @@ class PubMedSearcher:
             self.logger.error(f"Error parsing search results XML: {e}")
             return []
     
+    async def _parse_batch(self, xml_content: bytes, pool: Optional[ProcessPoolExecutor]) -> List[PubMedArticle]:
+        """Parse one efetch response, on the worker pool when one is given"""
+        if not xml_content:
+            return []
+        if pool is None:
+            return self._parse_article_details(xml_content)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, parse_article_details_bytes, xml_content)
+    
     # ... rest of your existing methods remain the same ...
     async def fetch_article_details(self, pmids: List[str]) -> List[PubMedArticle]:
         """
@@ -181,185 +477,148 @@ class PubMedSearcher:
         """
         articles = []
         
-        # Process PMIDs in batches to respect rate limits
-        batch_size = 200  # PubMed allows up to 200 IDs per request
+        # Only PMIDs missing from the cache go to the network
+        cached = self._load_cached_articles(pmids) if self.cache is not None else {}
+        to_fetch = [pmid for pmid in dict.fromkeys(pmids) if pmid not in cached]
+        if self.cache is not None:
+            self.logger.info(f"PubMed cache: {len(cached)} hits, {len(to_fetch)} to fetch")
         
-        for i in range(0, len(pmids), batch_size):
-            batch_pmids = pmids[i:i + batch_size]
-            batch_articles = await self._fetch_batch_details(batch_pmids)
-            articles.extend(batch_articles)
+        # Process PMIDs in batches to respect rate limits
+        # IDs are POSTed, so batches aren't limited by URL length
+        batch_size = self.fetch_batch_size
+        batches = [to_fetch[i:i + batch_size] for i in range(0, len(to_fetch), batch_size)]
+        
+        # Requests start rate_limit_delay apart but overlap while in flight,
+        # with at most max_concurrent_requests outstanding at once
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        
+        # With several batches, responses are parsed on worker processes while
+        # the remaining requests are still downloading
+        pool = None
+        if len(batches) > 1 and self.parse_workers > 1:
+            pool = ProcessPoolExecutor(max_workers=min(self.parse_workers, len(batches)))
+        
+        async def fetch(index: int, batch_pmids: List[str]) -> List[PubMedArticle]:
+            await asyncio.sleep(index * self.rate_limit_delay)
+            async with semaphore:
+                xml_content = await self._fetch_batch_details(batch_pmids)
+            # Parse outside the semaphore so the next request can go out meanwhile
+            return await self._parse_batch(xml_content, pool)
+        
+        if batches:
+            try:
+                results = await asyncio.gather(
+                    *(fetch(i, batch) for i, batch in enumerate(batches)),
+                    return_exceptions=True
+                )
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+            for batch_articles in results:
+                # One failed batch shouldn't discard the others
+                if isinstance(batch_articles, Exception):
+                    self.logger.error(f"Error fetching article batch: {batch_articles}")
+                    continue
+                articles.extend(batch_articles)
+        
+        if self.cache is not None:
+            self._store_cached_articles(articles)
             
-            # Rate limiting
-            await asyncio.sleep(self.rate_limit_delay)
+            # Restore the requested order across cached and fetched articles
+            by_pmid = {**cached, **{article.pmid: article for article in articles}}
+            articles = [by_pmid[pmid] for pmid in dict.fromkeys(pmids) if pmid in by_pmid]
         
         self.logger.info(f"Retrieved details for {len(articles)} articles")
         return articles
     
-    async def _fetch_batch_details(self, pmids: List[str]) -> List[PubMedArticle]:
-        """Fetch details for a batch of PMIDs"""
+    async def _fetch_batch_details(self, pmids: List[str]) -> bytes:
+        """Fetch the raw efetch XML for a batch of PMIDs (empty on failure)"""
         if not pmids:
-            return []
+            return b""
         
-        # Parameters for efetch
-        params = {
-            'db': 'pubmed',
-            'id': ','.join(pmids),
-            'retmode': 'xml',
-            'tool': 'ubmi-ifc-podcast',
-            'email': self.email
-        }
-        
-        if self.api_key:
-            params['api_key'] = self.api_key
+        # Parameters for efetch; only the ID list changes between batches
+        params = {**self._efetch_params, 'id': ','.join(pmids)}
         
-        url = f"{self.base_url}efetch.fcgi?" + urlencode(params)
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        xml_content = await response.text()
-                        return self._parse_article_details(xml_content)
-                    else:
-                        self.logger.error(f"Article fetch failed with status {response.status}")
-                        return []
-            except Exception as e:
-                self.logger.error(f"Error fetching article details: {str(e)}")
-                return []
-    
-    def _parse_article_details(self, xml_content: str) -> List[PubMedArticle]:
-        """Parse XML response to extract article details"""
-        articles = []
+        # NCBI asks for large ID lists to be POSTed rather than put in the URL
+        url = f"{self.base_url}efetch.fcgi"
         
         try:
-            root = ET.fromstring(xml_content)
-            for article_elem in root.findall('.//PubmedArticle'):
-                article = self._parse_single_article(article_elem)
-                if article:
-                    articles.append(article)
-                    
-        except ET.ParseError as e:
-            self.logger.error(f"Error parsing article details XML: {e}")
-        
-        return articles
+            status, xml_content = await self._request_with_retry('POST', url, data=params)
+            if status == 200:
+                return xml_content
+            else:
+                self.logger.error(f"Article fetch failed with status {status}")
+                return b""
+        except Exception as e:
+            self.logger.error(f"Error fetching article details: {str(e)}")
+            return b""
     
-    def _parse_single_article(self, article_elem) -> Optional[PubMedArticle]:
-        """Parse a single article from XML"""
-        # Extract PMID
-        pmid_elem = article_elem.find('.//PMID')
-        if pmid_elem is None:
-            return None
-        pmid = pmid_elem.text
-        
-        # Extract title
-        title_elem = article_elem.find('.//ArticleTitle')
-        title = title_elem.text if title_elem is not None else ""
-        
-        # Extract abstract
-        abstract_texts = []
-        for abstract_elem in article_elem.findall('.//AbstractText'):
-            if abstract_elem.text:
-                abstract_texts.append(abstract_elem.text)
-        abstract = " ".join(abstract_texts)
-        
-        # Extract authors
-        authors = []
-        for author_elem in article_elem.findall('.//Author'):
-            lastname = author_elem.find('LastName')
-            firstname = author_elem.find('ForeName')
-            if lastname is not None:
-                author_name = lastname.text or ""
-                if firstname is not None and firstname.text:
-                    author_name = f"{firstname.text} {author_name}"
-                authors.append(author_name)
-        
-        # Extract journal
-        journal_elem = article_elem.find('.//Journal/Title')
-        journal = journal_elem.text if journal_elem is not None else ""
-        
-        # Extract publication date
-        pub_date_elem = article_elem.find('.//PubDate')
-        pub_date = ""
-        if pub_date_elem is not None:
-            year_elem = pub_date_elem.find('Year')
-            month_elem = pub_date_elem.find('Month')
-            day_elem = pub_date_elem.find('Day')
-            
-            if year_elem is not None:
-                pub_date = year_elem.text or ""
-                if month_elem is not None:
-                    pub_date += f"-{month_elem.text or '01'}"
-                    if day_elem is not None:
-                        pub_date += f"-{day_elem.text or '01'}"
-        
-        # Extract DOI
-        doi = None
-        for id_elem in article_elem.findall('.//ArticleId'):
-            if id_elem.get('IdType') == 'doi':
-                doi = id_elem.text
-                break
-        
-        # Extract MeSH terms
-        mesh_terms = []
-        for mesh_elem in article_elem.findall('.//MeshHeading/DescriptorName'):
-            if mesh_elem.text:
-                mesh_terms.append(mesh_elem.text)
-        
-        return PubMedArticle(
-            pmid=pmid,
-            title=title,
-            abstract=abstract,
-            authors=authors,
-            journal=journal,
-            publication_date=pub_date,
-            doi=doi,
-            mesh_terms=mesh_terms
-        )
+    def _parse_article_details(self, xml_content: bytes) -> List[PubMedArticle]:
+        """Parse XML response (raw bytes, as lxml requires for encoded XML) to extract article details"""
+        return parse_article_details_bytes(xml_content)
     
     def save_articles(self, articles: List[PubMedArticle], 
-                     output_path: str = None) -> None:
-        """Save articles to JSON file"""
+                     output_path: str = None,
+                     format: str = 'json') -> None:
+        """Save articles to a JSON file, or a Parquet file with format='parquet'"""
+        if format == 'parquet':
+            self._save_articles_parquet(articles, output_path or "pubmed_articles.parquet")
+            return
+        
         if output_path is None:
             output_path = "pubmed_articles.json"
         
-        # Convert articles to dictionaries
-        articles_data = []
-        for article in articles:
-            articles_data.append({
-                'pmid': article.pmid,
-                'title': article.title,
-                'abstract': article.abstract,
-                'authors': article.authors,
-                'journal': article.journal,
-                'publication_date': article.publication_date,
-                'doi': article.doi,
-                'keywords': article.keywords,
-                'mesh_terms': article.mesh_terms,
-                'similarity_score': article.similarity_score
-            })
-        
-        # Save to JSON
-        with open(output_path, 'w', encoding='utf-8') as f:
-            import json
-            json.dump(articles_data, f, indent=2, ensure_ascii=False, default=str)
+        # orjson serializes the dataclasses (and numpy scores) directly
+        if orjson is not None:
+            Path(output_path).write_bytes(orjson.dumps(
+                articles,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+                default=str
+            ))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump([asdict(article) for article in articles], f,
+                          indent=2, ensure_ascii=False, default=str)
+        
+        self.logger.info(f"Saved {len(articles)} articles to {output_path}")
+
+    def _save_articles_parquet(self, articles: List[PubMedArticle], output_path: str) -> None:
+        """Save articles as a zstd-compressed Parquet file with native list columns"""
+        if pa is None:
+            raise ImportError("pyarrow is required to save articles as Parquet")
+        
+        schema = pa.schema([
+            ('pmid', pa.string()),
+            ('title', pa.string()),
+            ('abstract', pa.large_string()),
+            ('authors', pa.list_(pa.string())),
+            ('journal', pa.string()),
+            ('publication_date', pa.string()),
+            ('doi', pa.string()),
+            ('keywords', pa.list_(pa.string())),
+            ('mesh_terms', pa.list_(pa.string())),
+            ('similarity_score', pa.float32()),
+        ])
+        columns = {name: [getattr(article, name) for article in articles] for name in schema.names}
+        
+        pq.write_table(pa.Table.from_pydict(columns, schema=schema), output_path, compression='zstd')
         
         self.logger.info(f"Saved {len(articles)} articles to {output_path}")
 
 
 async def main():
     """Test function"""
-    searcher = PubMedSearcher()
-    
-    # Search for recent articles
-    pmids = await searcher.search_recent_articles(
-        query_terms=["neuroscience", "physiology"],
-        days_back=7,
-        max_results=10
-    )
-    
-    # Fetch details
-    articles = await searcher.fetch_article_details(pmids)
-    searcher.save_articles(articles)
+    async with PubMedSearcher() as searcher:
+        # Search for recent articles
+        pmids = await searcher.search_recent_articles(
+            query_terms=["neuroscience", "physiology"],
+            days_back=7,
+            max_results=10
+        )
+        
+        # Fetch details
+        articles = await searcher.fetch_article_details(pmids)
+        searcher.save_articles(articles)
     
     print(f"Found {len(articles)} articles")
     for article in articles[:3]:
@@ -1,7 +1,107 @@
 """PubMed XML parsing utilities."""
 
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Any, Optional
+import io
+from typing import BinaryIO, List, Dict, Any, Optional, Union
+
+try:
+    from lxml import etree as ET  # Optional, faster C XML parser
+except ImportError:
+    from xml.etree import ElementTree as ET
+
+
+def collect_article_fields(article_elem) -> Dict[str, Any]:
+    """
+    Collect the fields of a PubmedArticle element in a single tree walk.
+    
+    Shared by PubmedXMLParser and PubMedSearcher, which format the fields
+    differently. Where a field can appear more than once, the first
+    occurrence wins.
+    
+    Args:
+        article_elem: XML element representing a single article
+        
+    Returns:
+        dict: 'pmid', 'title', 'journal' (Journal/Title), 'pub_date', 'year'
+        (PubDate/Year), 'abstract' (first Abstract/AbstractText),
+        'elocation_doi' and 'article_id_doi' elements or None; 'abstract_texts'
+        (every AbstractText, in order), 'authors' ((LastName, ForeName) element
+        pairs, ForeName may be None), 'mesh_terms' and 'keywords' lists
+    """
+    pmid = title = journal = pub_date = year = abstract = None
+    elocation_doi = article_id_doi = None
+    abstract_texts = []
+    authors = []
+    mesh_terms = []
+    keywords = []
+    # Bound once; structured abstracts append one text per labeled section
+    add_abstract_text = abstract_texts.append
+    
+    for elem in article_elem.iter():
+        tag = elem.tag
+        if tag == 'PMID':
+            if pmid is None:
+                pmid = elem
+        elif tag == 'ArticleTitle':
+            if title is None:
+                title = elem
+        elif tag == 'Abstract' or tag == 'OtherAbstract':
+            for section in elem:
+                if section.tag != 'AbstractText':
+                    continue
+                if abstract is None and tag == 'Abstract':
+                    abstract = section
+                text = section.text
+                if text:
+                    add_abstract_text(text)
+        elif tag == 'Author':
+            # Pick the name parts out of the author's children in one pass
+            lastname = firstname = None
+            for part in elem:
+                part_tag = part.tag
+                if part_tag == 'LastName':
+                    if lastname is None:
+                        lastname = part
+                elif part_tag == 'ForeName':
+                    if firstname is None:
+                        firstname = part
+            if lastname is not None:
+                authors.append((lastname, firstname))
+        elif tag == 'Journal':
+            if journal is None:
+                journal = elem.find('Title')
+        elif tag == 'PubDate':
+            if pub_date is None:
+                pub_date = elem
+            if year is None:
+                year = elem.find('Year')
+        elif tag == 'ELocationID':
+            if elocation_doi is None and elem.get('EIdType') == 'doi':
+                elocation_doi = elem
+        elif tag == 'ArticleId':
+            if article_id_doi is None and elem.get('IdType') == 'doi':
+                article_id_doi = elem
+        elif tag == 'MeshHeading':
+            for descriptor in elem:
+                if descriptor.tag == 'DescriptorName' and descriptor.text:
+                    mesh_terms.append(descriptor.text)
+        elif tag == 'Keyword':
+            if elem.text:
+                keywords.append(elem.text)
+    
+    return {
+        'pmid': pmid,
+        'title': title,
+        'journal': journal,
+        'pub_date': pub_date,
+        'year': year,
+        'abstract': abstract,
+        'elocation_doi': elocation_doi,
+        'article_id_doi': article_id_doi,
+        'abstract_texts': abstract_texts,
+        'authors': authors,
+        'mesh_terms': mesh_terms,
+        'keywords': keywords,
+    }
 
 
 class PubmedXMLParser:
@@ -11,30 +111,52 @@ class PubmedXMLParser:
         """Initialize the XML parser."""
         pass
     
-    def parse_pubmed_xml(self, xml_content: str) -> List[Dict[str, Any]]:
+    def parse_pubmed_xml(self, xml_content: Union[str, bytes]) -> List[Dict[str, Any]]:
         """
         Parse PubMed XML response and extract article information.
         
         Args:
             xml_content: Raw XML content from PubMed API
             
+        Returns:
+            list: List of parsed article dictionaries
+        """
+        # lxml rejects str input that carries an encoding declaration
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode('utf-8')
+        
+        # Parse incrementally so articles are freed as soon as they are read
+        return self.parse_pubmed_xml_stream(io.BytesIO(xml_content))
+    
+    def parse_pubmed_xml_stream(self, source: BinaryIO) -> List[Dict[str, Any]]:
+        """
+        Parse a PubMed XML response incrementally from a file-like object.
+        
+        Each PubmedArticle is parsed as soon as it is complete and then cleared,
+        so the whole document tree is never held in memory.
+        
+        Args:
+            source: Binary file-like object with the XML (e.g. a streamed HTTP response)
+            
         Returns:
             list: List of parsed article dictionaries
         """
         articles = []
         
         try:
-            root = ET.fromstring(xml_content)
-            
-            for article in root.findall('.//PubmedArticle'):
+            for _, elem in ET.iterparse(source, events=('end',)):
+                if elem.tag != 'PubmedArticle':
+                    continue
+                
                 try:
-                    parsed_article = self.parse_single_article(article)
+                    parsed_article = self.parse_single_article(elem)
                     if parsed_article:
                         articles.append(parsed_article)
                         
                 except Exception as e:
                     print(f"Error parsing article: {e}")
-                    continue
+                finally:
+                    elem.clear()
                     
         except Exception as e:
             print(f"Error parsing XML: {e}")
@@ -52,31 +174,32 @@ class PubmedXMLParser:
             dict: Parsed article data or None if parsing fails
         """
         try:
+            fields = collect_article_fields(article_elem)
+            
             # Extract basic info
-            pmid = self.get_text_or_none(article_elem.find('.//PMID'))
+            pmid = self.get_text_or_none(fields['pmid'])
             if not pmid:
                 return None
             
-            title_elem = article_elem.find('.//ArticleTitle')
+            title_elem = fields['title']
             title = title_elem.text if title_elem is not None else "No title"
             
             # Authors
-            authors = self.extract_authors(article_elem)
+            authors = self._format_authors(fields['authors'])
             
             # Journal and year
-            journal_elem = article_elem.find('.//Journal/Title')
+            journal_elem = fields['journal']
             journal = journal_elem.text if journal_elem is not None else "Unknown"
             
-            year_elem = article_elem.find('.//PubDate/Year')
+            year_elem = fields['year']
             year = int(year_elem.text) if year_elem is not None else None
             
             # Abstract
-            abstract_elem = article_elem.find('.//Abstract/AbstractText')
+            abstract_elem = fields['abstract']
             abstract = abstract_elem.text if abstract_elem is not None else ""
             
             # DOI
-            doi_elem = article_elem.find('.//ELocationID[@EIdType="doi"]')
-            doi = doi_elem.text if doi_elem is not None else None
+            doi = self.get_text_or_none(fields['elocation_doi'])
             
             article_data = {
                 'pmid': pmid,
@@ -106,6 +229,18 @@ class PubmedXMLParser:
         """
         return elem.text if elem is not None else None
     
+    def _format_authors(self, author_elems) -> List[str]:
+        """Format (LastName, ForeName) element pairs as "Last, First" names."""
+        authors = []
+        
+        for lastname, firstname in author_elems:
+            author_name = lastname.text
+            if firstname is not None:
+                author_name += f", {firstname.text}"
+            authors.append(author_name)
+        
+        return authors
+    
     def extract_authors(self, article_elem) -> List[str]:
         """
         Extract author list from article XML element.
@@ -116,19 +251,7 @@ class PubmedXMLParser:
         Returns:
             list: List of author names
         """
-        authors = []
-        
-        for author in article_elem.findall('.//Author'):
-            lastname = author.find('.//LastName')
-            firstname = author.find('.//ForeName')
-            
-            if lastname is not None:
-                author_name = lastname.text
-                if firstname is not None:
-                    author_name += f", {firstname.text}"
-                authors.append(author_name)
-        
-        return authors
+        return self._format_authors(collect_article_fields(article_elem)['authors'])
     
     def extract_mesh_terms(self, article_elem) -> List[str]:
         """
@@ -140,14 +263,7 @@ class PubmedXMLParser:
         Returns:
             list: List of MeSH terms
         """
-        mesh_terms = []
-        
-        for mesh_heading in article_elem.findall('.//MeshHeading'):
-            descriptor = mesh_heading.find('.//DescriptorName')
-            if descriptor is not None:
-                mesh_terms.append(descriptor.text)
-        
-        return mesh_terms
+        return collect_article_fields(article_elem)['mesh_terms']
     
     def extract_keywords(self, article_elem) -> List[str]:
         """
@@ -159,10 +275,4 @@ class PubmedXMLParser:
         Returns:
             list: List of keywords
         """
-        keywords = []
-        
-        for keyword in article_elem.findall('.//Keyword'):
-            if keyword.text:
-                keywords.append(keyword.text)
-        
-        return keywords
\ No newline at end of file
+        return collect_article_fields(article_elem)['keywords']
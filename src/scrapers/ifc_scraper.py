@@ -4,28 +4,80 @@ Web scraper for IFC-UNAM publications
 
 import asyncio
 import aiohttp
+import json
+import re
+import sqlite3
+import sys
 import time
-from typing import List, Dict, Optional
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, fields
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin, parse_qs, urlparse
-import pandas as pd
 from pathlib import Path
 
+try:
+    import orjson  # Optional, faster JSON serialization
+except ImportError:
+    orjson = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser  # Optional, faster C HTML parser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401  Optional, faster BeautifulSoup tree builder
+    _BS4_PARSER = 'lxml'
+except ImportError:
+    _BS4_PARSER = 'html.parser'
+
 # Handle both relative and absolute imports for notebook compatibility
 try:
     from ..utils.logger import get_logger
-    from ..utils.config import load_config
+    from ..utils.config import load_config, get_data_dir
 except ImportError:
     # Fallback for notebook/standalone usage
     import sys
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent))
     from utils.logger import get_logger
-    from utils.config import load_config
+    from utils.config import load_config, get_data_dir
+
 
+# Citation parts of a publication entry, e.g. "Authors (2024). Title. Journal. 10.x/y"
+_DOI_RE = re.compile(r'10\.\d+/[^\s<>"]+')
+_YEAR_RE = re.compile(r'\((\d{4})\)')
+_TITLE_RE = re.compile(r'\(\d{4}\)\.\s*([^.]+\.)')
+_AUTHOR_RE = re.compile(r'^([^(]+)\s*\(')
+_JOURNAL_RE = re.compile(r'^\s*\.?\s*([^.]+)')
+# Authors, year and title in one pass; the patterns above are the fallback.
+# Authors never contain "(", so this finds the same year and title they would
+_CITATION_RE = re.compile(r'^(?P<authors>[^(]+)\((?P<year>\d{4})\)\.\s*(?P<title>[^.]+\.)')
 
-@dataclass
+# Publication entries on the listing page are links with either of these classes
+_PUBLICATION_LINK_CLASSES = ['opensans400', 'd-flexy']
+
+
+def _is_publication_link_class(value) -> bool:
+    """Class filter for the listing strainer, which may see the raw class string"""
+    if not value:
+        return False
+    classes = value.split() if isinstance(value, str) else value
+    return any(cls in classes for cls in _PUBLICATION_LINK_CLASSES)
+
+
+# First link to PubMed on a detail page (case-insensitive href match)
+_PUBMED_LINK_SELECTOR = 'a[href*="pubmed" i]'
+
+# Without selectolax, BeautifulSoup only builds the publication links of a listing page
+_PUBLICATION_LINK_STRAINER = SoupStrainer('a', class_=_is_publication_link_class)
+
+
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class Publication:
     """Data class for publication information"""
     title: str
@@ -37,6 +89,10 @@ class Publication:
     ifc_url: Optional[str] = None
     abstract: Optional[str] = None
     keywords: Optional[List[str]] = None
+    
+    def to_dict(self) -> Dict:
+        """Shallow dict of the publication fields (keywords list is shared, not copied)"""
+        return {field.name: getattr(self, field.name) for field in fields(self)}
 
 
 class IFCPublicationScraper:
@@ -48,6 +104,115 @@ class IFCPublicationScraper:
         self.base_url = self.config['ifc']['base_url']
         self.rate_limit_delay = self.config['ifc']['rate_limit_delay']
         
+        # HTTP session shared by all page requests, created on first use
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._next_request_time = 0.0
+        
+        # Persistent cache of fetched pages, keyed by URL
+        cache_config = self.config['ifc'].get('cache') or {}
+        self.cache = None
+        self.cache_ttl = cache_config.get('ttl_days', 1) * 86400
+        if cache_config.get('enabled', False):
+            self.cache = self._open_cache()
+    
+    async def __aenter__(self) -> "IFCPublicationScraper":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, so connections to the IFC site are reused across pages"""
+        if self._session is None or self._session.closed:
+            # limit_per_host caps how many pages are downloaded at once
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=20, limit_per_host=4, keepalive_timeout=30, ttl_dns_cache=300
+                )
+            )
+        return self._session
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _open_cache(self) -> sqlite3.Connection:
+        """Open the URL -> page cache"""
+        cache_dir = get_data_dir() / "cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        cache = sqlite3.connect(str(cache_dir / "ifc_pages.db"))
+        cache.execute("PRAGMA journal_mode=WAL")
+        cache.execute(
+            "CREATE TABLE IF NOT EXISTS pages "
+            "(url TEXT PRIMARY KEY, html TEXT, etag TEXT, last_modified TEXT, fetched_at REAL)"
+        )
+        cache.commit()
+        return cache
+    
+    def _store_cached_page(self, url: str, html: str, etag: Optional[str],
+                           last_modified: Optional[str]) -> None:
+        """Add a freshly fetched page to the cache"""
+        self.cache.execute(
+            "INSERT OR REPLACE INTO pages (url, html, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, html, etag, last_modified, time.time())
+        )
+        self.cache.commit()
+    
+    async def _fetch_page(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        """
+        Fetch a page's HTML, going through the page cache when it is enabled
+        
+        Fresh cached pages are returned without a request; stale ones are
+        revalidated with their ETag / Last-Modified, so unchanged pages cost
+        a 304 instead of a full download.
+        
+        Returns:
+            The page HTML, or None when the server answers with an error status
+        """
+        cached = None
+        headers = {}
+        if self.cache is not None:
+            cached = self.cache.execute(
+                "SELECT html, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if cached:
+                html, etag, last_modified, fetched_at = cached
+                if time.time() - fetched_at < self.cache_ttl:
+                    return html
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
+        
+        await self._throttle()
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and cached:
+                self._store_cached_page(url, cached[0], cached[1], cached[2])
+                return cached[0]
+            if response.status != 200:
+                self.logger.error(f"Failed to fetch {url}, status: {response.status}")
+                return None
+            # Decode with the declared charset (the site serves UTF-8) instead of
+            # response.text(), which runs charset detection on undeclared bodies
+            raw = await response.read()
+            html = raw.decode(response.charset or 'utf-8', errors='replace')
+            if self.cache is not None:
+                self._store_cached_page(
+                    url, html, response.headers.get('ETag'), response.headers.get('Last-Modified')
+                )
+            return html
+    
+    async def _throttle(self) -> None:
+        """Wait until this request may start, so requests start rate_limit_delay apart"""
+        now = time.monotonic()
+        wait = self._next_request_time - now
+        self._next_request_time = max(now, self._next_request_time) + self.rate_limit_delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+        
     async def scrape_publications_by_year(self, year: int) -> List[Publication]:
         """
         Scrape publications for a specific year
@@ -62,79 +227,77 @@ class IFCPublicationScraper:
         
         url = f"{self.base_url}/publicaciones.php?year={year}"
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        publications = self._parse_publications_page(html, year)
-                        
-                        # Get detailed information for each publication
-                        detailed_publications = []
-                        for pub in publications:
-                            if pub.ifc_url:
-                                detailed_pub = await self._get_publication_details(session, pub)
-                                detailed_publications.append(detailed_pub)
-                                await asyncio.sleep(self.rate_limit_delay)
-                        
-                        return detailed_publications
-                    else:
-                        self.logger.error(f"Failed to fetch {url}, status: {response.status}")
-                        return []
-                        
-            except Exception as e:
-                self.logger.error(f"Error scraping year {year}: {str(e)}")
+        session = await self._get_session()
+        try:
+            html = await self._fetch_page(session, url)
+            if html is None:
                 return []
+            publications = self._parse_publications_page(html, year)
+            
+            # Get detailed information for each publication; the detail pages
+            # download concurrently, still starting rate_limit_delay apart
+            return list(await asyncio.gather(*(
+                self._get_publication_details(session, pub)
+                for pub in publications if pub.ifc_url
+            )))
+                    
+        except Exception as e:
+            self.logger.error(f"Error scraping year {year}: {str(e)}")
+            return []
     
     def _parse_publications_page(self, html: str, year: int) -> List[Publication]:
         """Parse the publications listing page based on actual website structure"""
-        soup = BeautifulSoup(html, 'html.parser')
         publications = []
         
         # Based on analysis: publications are in <a> tags with classes 'opensans400' and 'd-flexy'
-        publication_links = soup.find_all('a', class_=['opensans400', 'd-flexy'])
+        publication_links = self._find_publication_links(html)
         
         self.logger.info(f"Found {len(publication_links)} potential publication links")
         
-        for i, link in enumerate(publication_links):
+        for i, (link_text, detail_url) in enumerate(publication_links):
             try:
                 # Get the full text of the publication entry
-                pub_text = link.get_text().strip()
+                pub_text = link_text.strip()
                 
                 # Skip if this doesn't look like a publication (too short or no DOI pattern)
                 if len(pub_text) < 50 or '10.' not in pub_text:
                     continue
                 
-                # Extract publication details using regex patterns
-                import re
+                # Extract publication details using the precompiled patterns
                 
                 # Extract DOI
-                doi_match = re.search(r'10\.\d+/[^\s<>"]+', pub_text)
+                doi_match = _DOI_RE.search(pub_text)
                 doi = doi_match.group() if doi_match else ""
                 
-                # Extract year (typically in parentheses)
-                year_match = re.search(r'\((\d{4})\)', pub_text)
-                pub_year = int(year_match.group(1)) if year_match else year
-                
-                # Extract title (usually after year and before journal)
-                # Pattern: (...year...). Title. Journal
-                title_match = re.search(r'\(\d{4}\)\.\s*([^.]+\.)', pub_text)
-                title = title_match.group(1).strip().rstrip('.') if title_match else pub_text[:100]
-                
-                # Extract authors (before the year)
-                author_match = re.search(r'^([^(]+)\s*\(', pub_text)
-                authors = author_match.group(1).strip() if author_match else ""
+                citation_match = _CITATION_RE.match(pub_text)
+                if citation_match:
+                    # Usual "Authors (year). Title." shape: one anchored match gives all three
+                    authors = citation_match.group('authors').strip()
+                    pub_year = int(citation_match.group('year'))
+                    title = citation_match.group('title').strip().rstrip('.')
+                else:
+                    # Extract year (typically in parentheses)
+                    year_match = _YEAR_RE.search(pub_text)
+                    pub_year = int(year_match.group(1)) if year_match else year
+                    
+                    # Extract title (usually after year and before journal)
+                    # Pattern: (...year...). Title. Journal
+                    title_match = _TITLE_RE.search(pub_text)
+                    title = title_match.group(1).strip().rstrip('.') if title_match else pub_text[:100]
+                    
+                    # Extract authors (before the year)
+                    author_match = _AUTHOR_RE.search(pub_text)
+                    authors = author_match.group(1).strip() if author_match else ""
                 
                 # Extract journal (try different patterns)
-                if title and title in pub_text:
-                    remaining_text = pub_text.split(title, 1)[1] if title in pub_text else pub_text
-                    journal_match = re.search(r'^\s*\.?\s*([^.]+)', remaining_text)
+                title_idx = pub_text.find(title) if title else -1
+                if title_idx != -1:
+                    journal_match = _JOURNAL_RE.search(pub_text[title_idx + len(title):])
                     journal = journal_match.group(1).strip() if journal_match else ""
                 else:
                     journal = ""
                 
                 # Get the href for more details
-                detail_url = link.get('href')
                 if detail_url and not detail_url.startswith('http'):
                     detail_url = f"https://www.ifc.unam.mx/{detail_url}"
                 
@@ -158,35 +321,94 @@ class IFCPublicationScraper:
         self.logger.info(f"Successfully parsed {len(publications)} publications")
         return publications
     
+    @staticmethod
+    def _find_publication_links(html: str) -> List[Tuple[str, Optional[str]]]:
+        """Text and href of each publication link on a listing page, in page order"""
+        if LexborHTMLParser is not None:
+            tree = LexborHTMLParser(html)
+            links = []
+            for link in tree.css('a[class]'):
+                classes = (link.attributes.get('class') or '').split()
+                if any(cls in classes for cls in _PUBLICATION_LINK_CLASSES):
+                    links.append((link.text(deep=True), link.attributes.get('href')))
+            return links
+        
+        soup = BeautifulSoup(html, _BS4_PARSER, parse_only=_PUBLICATION_LINK_STRAINER)
+        return [
+            (link.get_text(), link.get('href'))
+            for link in soup.find_all('a', class_=_PUBLICATION_LINK_CLASSES)
+        ]
+    
+    @staticmethod
+    def _parse_detail_page(html: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Pull the abstract, DOI and PubMed link out of a publication detail page
+        
+        Returns:
+            Tuple of (abstract, doi, pubmed_url); each is None when not on the page
+        """
+        abstract = doi = pubmed_url = None
+        
+        if LexborHTMLParser is not None:
+            tree = LexborHTMLParser(html)
+            
+            abstract_element = tree.css_first('div.abstract')  # Adjust selector
+            if abstract_element is not None:
+                abstract = abstract_element.text(deep=True, separator='', strip=True)
+            
+            # The DOI is the text right after a <span>DOI:</span> label
+            for span in tree.css('span'):
+                if span.text(deep=True) == 'DOI:':
+                    sibling = span.next
+                    if sibling is not None and sibling.tag == '-text' and sibling.text_content:
+                        doi = sibling.text_content.strip()
+                    break
+            
+            pubmed_element = tree.css_first(_PUBMED_LINK_SELECTOR)
+            if pubmed_element is not None:
+                pubmed_url = pubmed_element.attributes.get('href')
+            
+            return abstract, doi, pubmed_url
+        
+        # Parsed in full: the DOI is a bare text node that a SoupStrainer would drop
+        soup = BeautifulSoup(html, _BS4_PARSER)
+        
+        abstract_element = soup.find('div', class_='abstract')  # Adjust selector
+        if abstract_element:
+            abstract = abstract_element.get_text(strip=True)
+        
+        doi_element = soup.find('span', string='DOI:')  # Adjust selector
+        if doi_element and doi_element.next_sibling:
+            doi = doi_element.next_sibling.strip()
+        
+        pubmed_element = soup.select_one(_PUBMED_LINK_SELECTOR)
+        if pubmed_element:
+            pubmed_url = pubmed_element.get('href')
+        
+        return abstract, doi, pubmed_url
+    
     async def _get_publication_details(self, session: aiohttp.ClientSession, 
                                      publication: Publication) -> Publication:
         """Get detailed information from publication detail page"""
         try:
-            async with session.get(publication.ifc_url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Extract abstract
-                    abstract_element = soup.find('div', class_='abstract')  # Adjust selector
-                    if abstract_element:
-                        publication.abstract = abstract_element.get_text(strip=True)
-                    
-                    # Extract DOI
-                    doi_element = soup.find('span', string='DOI:')  # Adjust selector
-                    if doi_element and doi_element.next_sibling:
-                        publication.doi = doi_element.next_sibling.strip()
-                    
-                    # Extract PubMed ID
-                    pubmed_element = soup.find('a', href=lambda x: x and 'pubmed' in x.lower())
-                    if pubmed_element:
-                        href = pubmed_element.get('href')
-                        if href and 'pubmed' in href.lower():
-                            # Extract PubMed ID from URL
-                            publication.pubmed_id = self._extract_pubmed_id(href)
-                    
-                    self.logger.debug(f"Got details for: {publication.title[:50]}...")
-                    
+            html = await self._fetch_page(session, publication.ifc_url)
+            if html is not None:
+                abstract, doi, pubmed_url = self._parse_detail_page(html)
+                
+                # Extract abstract
+                if abstract is not None:
+                    publication.abstract = abstract
+                
+                # Extract DOI
+                if doi is not None:
+                    publication.doi = doi
+                
+                # Extract PubMed ID from URL
+                if pubmed_url:
+                    publication.pubmed_id = self._extract_pubmed_id(pubmed_url)
+                
+                self.logger.debug(f"Got details for: {publication.title[:50]}...")
+                
         except Exception as e:
             self.logger.warning(f"Error getting details for {publication.title}: {str(e)}")
         
@@ -225,8 +447,11 @@ class IFCPublicationScraper:
         
         all_publications = []
         
-        for year in range(start_year, end_year + 1):
-            publications = await self.scrape_publications_by_year(year)
+        # Years are scraped concurrently over the shared session; results keep year order
+        results = await asyncio.gather(*(
+            self.scrape_publications_by_year(year) for year in range(start_year, end_year + 1)
+        ))
+        for publications in results:
             all_publications.extend(publications)
             
         self.logger.info(f"Total publications scraped: {len(all_publications)}")
@@ -239,41 +464,31 @@ class IFCPublicationScraper:
             from ..utils.config import get_data_dir
             output_path = get_data_dir() / "raw" / "ifc_publications.json"
         
-        # Convert to DataFrame for easy saving
-        data = []
-        for pub in publications:
-            data.append({
-                'title': pub.title,
-                'authors': pub.authors,
-                'journal': pub.journal,
-                'year': pub.year,
-                'doi': pub.doi,
-                'pubmed_id': pub.pubmed_id,
-                'ifc_url': pub.ifc_url,
-                'abstract': pub.abstract,
-                'keywords': pub.keywords
-            })
-        
-        df = pd.DataFrame(data)
+        data = [pub.to_dict() for pub in publications]
         
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         if output_path.suffix == '.json':
-            df.to_json(output_path, orient='records', indent=2)
+            # Records go straight to JSON; no DataFrame round-trip
+            if orjson is not None:
+                output_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
         else:
-            df.to_csv(output_path, index=False)
+            import pandas as pd  # Only needed for CSV output
+            pd.DataFrame(data).to_csv(output_path, index=False)
         
         self.logger.info(f"Saved {len(publications)} publications to {output_path}")
 
 
 async def main():
     """Test function"""
-    scraper = IFCPublicationScraper()
-    
-    # Test with one year first
-    publications = await scraper.scrape_publications_by_year(2024)
-    scraper.save_publications(publications)
+    async with IFCPublicationScraper() as scraper:
+        # Test with one year first
+        publications = await scraper.scrape_publications_by_year(2024)
+        scraper.save_publications(publications)
     
     print(f"Scraped {len(publications)} publications from 2024")
     for pub in publications[:3]:  # Print first 3
@@ -2,14 +2,69 @@
 
 import os
 import glob
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import Dict, List, Optional
 from tqdm import tqdm
 
-try:
-    import fitz  # PyMuPDF
-except ImportError:
-    print("PyMuPDF not found. Install with: pip install pymupdf")
-    fitz = None
+# PyMuPDF, imported on first use so importing this module stays cheap
+fitz = None
+
+
+def _import_fitz():
+    """Import PyMuPDF once per process and return it (None if it is not installed)."""
+    global fitz
+    if fitz is None:
+        try:
+            import fitz as _fitz  # PyMuPDF
+        except ImportError:
+            print("PyMuPDF not found. Install with: pip install pymupdf")
+            return None
+        fitz = _fitz
+    return fitz
+
+
+def extract_text_from_pdf(
+    pdf_path: str, 
+    max_chars: Optional[int] = None, 
+    max_pages: Optional[int] = None
+) -> str:
+    """
+    Extract text from a single PDF file.
+    
+    Module-level so worker processes can run it for batches of PDFs.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        max_chars: Stop reading pages once this many characters are extracted (None for all)
+        max_pages: Read at most this many pages (None for all)
+        
+    Returns:
+        str: Extracted text content
+    """
+    try:
+        doc = _import_fitz().open(pdf_path)
+        pages = []
+        total_chars = 0
+        
+        # Extract text page by page, stopping at whichever limit is hit first
+        for page in doc:
+            page_text = page.get_text("text")
+            pages.append(page_text)
+            total_chars += len(page_text)
+            if max_chars is not None and total_chars >= max_chars:
+                break
+            if max_pages is not None and len(pages) >= max_pages:
+                break
+        
+        text = "".join(pages)
+        return text[:max_chars] if max_chars is not None else text
+    except Exception as e:
+        print(f"Error extracting text from {os.path.basename(pdf_path)}: {e}")
+        return ""
+    finally:
+        if 'doc' in locals():
+            doc.close()
 
 
 class PDFTextExtractor:
@@ -17,77 +72,129 @@ class PDFTextExtractor:
     
     def __init__(self):
         """Initialize the PDF text extractor."""
-        if fitz is None:
+        if _import_fitz() is None:
             raise ImportError("PyMuPDF is required for PDF text extraction. Install with: pip install pymupdf")
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def extract_text_from_pdf(
+        self, 
+        pdf_path: str, 
+        max_chars: Optional[int] = None, 
+        max_pages: Optional[int] = None
+    ) -> str:
         """
         Extract text from a single PDF file.
         
         Args:
             pdf_path: Path to the PDF file
+            max_chars: Stop reading pages once this many characters are extracted (None for all)
+            max_pages: Read at most this many pages (None for all)
             
         Returns:
             str: Extracted text content
         """
-        try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            # Extract text from each page
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text += page.get_text()
-            
-            return text
-        except Exception as e:
-            print(f"Error extracting text from {os.path.basename(pdf_path)}: {e}")
-            return ""
-        finally:
-            if 'doc' in locals():
-                doc.close()
+        return extract_text_from_pdf(pdf_path, max_chars, max_pages)
     
-    def batch_process_pdfs(self, pdf_dir: str, limit: Optional[int] = None) -> Dict[str, str]:
+    def batch_process_pdfs(
+        self, 
+        pdf_dir: str, 
+        limit: Optional[int] = None, 
+        max_chars: Optional[int] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, str]:
         """
         Process multiple PDFs and extract text from all.
         
         Args:
             pdf_dir: Directory containing PDF files
             limit: Maximum number of PDFs to process (None for all)
+            max_chars: Maximum characters to extract per PDF (None for the full text)
+            max_workers: Worker processes for extraction (defaults to CPU count, 1 runs in-process)
             
         Returns:
             dict: Dictionary mapping filename to extracted text
         """
-        pdf_files = glob.glob(os.path.join(pdf_dir, "**", "*.pdf"), recursive=True)
+        pdf_files = self.find_pdf_files(pdf_dir, limit)
+        print(f"Found {len(pdf_files)} PDF files to process")
         
-        if limit:
-            pdf_files = pdf_files[:limit]
+        return {
+            os.path.basename(pdf_path): text
+            for pdf_path, text in self.extract_texts(pdf_files, max_chars, max_workers).items()
+        }
+    
+    def find_pdf_files(self, pdf_dir: str, limit: Optional[int] = None) -> List[str]:
+        """
+        List the PDF files under a directory (recursively).
         
-        print(f"Found {len(pdf_files)} PDF files to process")
+        Args:
+            pdf_dir: Directory containing PDF files
+            limit: Maximum number of PDFs to return (None for all)
+            
+        Returns:
+            list: Paths of the PDF files
+        """
+        pdf_files = glob.glob(os.path.join(pdf_dir, "**", "*.pdf"), recursive=True)
+        return pdf_files[:limit] if limit else pdf_files
+    
+    def extract_texts(
+        self, 
+        pdf_files: List[str], 
+        max_chars: Optional[int] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        Extract text from a list of PDF files.
         
+        Args:
+            pdf_files: Paths of the PDF files
+            max_chars: Maximum characters to extract per PDF (None for the full text)
+            max_workers: Worker processes for extraction (defaults to CPU count, 1 runs in-process)
+            
+        Returns:
+            dict: Dictionary mapping PDF path to extracted text (PDFs without text are left out)
+        """
         results = {}
-        for pdf_path in tqdm(pdf_files, desc="Processing PDFs"):
-            filename = os.path.basename(pdf_path)
-            text = self.extract_text_from_pdf(pdf_path)
-            if text:
-                results[filename] = text
+        max_workers = min(max_workers or os.cpu_count() or 1, len(pdf_files)) or 1
+        
+        if max_workers > 1:
+            # Extraction is CPU-bound and independent per file; map keeps the file order.
+            # Each worker imports PyMuPDF once up front and reuses it for its whole share
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_import_fitz) as executor:
+                texts = executor.map(
+                    extract_text_from_pdf, pdf_files, repeat(max_chars),
+                    chunksize=max(1, len(pdf_files) // (max_workers * 4))
+                )
+                for pdf_path, text in zip(pdf_files, tqdm(texts, total=len(pdf_files), desc="Processing PDFs")):
+                    if text:
+                        results[pdf_path] = text
+        else:
+            for pdf_path in tqdm(pdf_files, desc="Processing PDFs"):
+                text = extract_text_from_pdf(pdf_path, max_chars)
+                if text:
+                    results[pdf_path] = text
         
         print(f"Successfully extracted text from {len(results)} PDFs")
         return results
     
-    def extract_first_pages_text(self, pdf_path: str, max_chars: int = 20000) -> str:
+    def extract_first_pages_text(
+        self, 
+        pdf_path: str, 
+        max_chars: int = 20000, 
+        max_pages: Optional[int] = None
+    ) -> str:
         """
         Extract text from the first few pages of a PDF (where affiliations typically appear).
         
+        Only the pages needed to reach either limit are read.
+        
         Args:
             pdf_path: Path to the PDF file
             max_chars: Maximum number of characters to extract
+            max_pages: Maximum number of pages to read (None for no page limit)
             
         Returns:
             str: Extracted text from first pages
         """
-        full_text = self.extract_text_from_pdf(pdf_path)
-        return full_text[:max_chars] if full_text else ""
+        return self.extract_text_from_pdf(pdf_path, max_chars, max_pages)
     
     def extract_and_store_full_text(
         self, 
@@ -107,13 +214,28 @@ class PDFTextExtractor:
         # Track which publications have full text
         has_full_text = set()
         
+        # PDFs are named after the DOI (PyPaperBot naming convention), so only
+        # files matching a publication's DOI need their text extracted
+        wanted = {
+            pub['doi'].replace('/', '_') + '.pdf'
+            for pub in publications_with_dois if pub.get('doi')
+        }
+        pdf_files = [
+            pdf_path for pdf_path in self.find_pdf_files(pdf_dir)
+            if os.path.basename(pdf_path) in wanted
+        ]
+        print(f"Found {len(pdf_files)} PDF files matching publication DOIs")
+        
         # Extract text from PDFs where available
-        pdf_texts = self.batch_process_pdfs(pdf_dir)
+        pdf_texts = {
+            os.path.basename(pdf_path): text
+            for pdf_path, text in self.extract_texts(pdf_files).items()
+        }
         
         # Match PDFs to publications by DOI
         for pub in publications_with_dois:
             if pub.get('doi'):
-                # Look for PDF with DOI in filename (PyPaperBot naming convention)
+                # Look for PDF with DOI in filename
                 doi_filename = pub['doi'].replace('/', '_') + '.pdf'
                 if doi_filename in pdf_texts:
                     # Store text with publication
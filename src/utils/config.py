@@ -2,15 +2,76 @@
 Configuration management for the podcast pipeline
 """
 
+import copy
+import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C parser, when PyYAML was built with it
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    from dotenv import load_dotenv  # Optional, reads API keys from a .env file
+except ImportError:
+    load_dotenv = None
+
+
+# Repository paths, derived once from this file's location
+_PROJECT_ROOT = Path(__file__).parent.parent.parent
+_DEFAULT_CONFIG_PATH = _PROJECT_ROOT / "config" / "config.yaml"
+_DEFAULT_CONFIG_STR = str(_DEFAULT_CONFIG_PATH.resolve())
+_DATA_DIR = _PROJECT_ROOT / "data"
+_OUTPUT_DIR = _PROJECT_ROOT / "outputs"
+
+# API keys every config exposes; 'google' is the Gemini key. Each can also be
+# set through the environment (or .env) as <PROVIDER>_API_KEY, e.g. OPENAI_API_KEY
+_API_KEY_PROVIDERS = ('openai', 'anthropic', 'elevenlabs', 'google', 'google_tts')
+
+
+class _ApiKeys(dict):
+    """api_keys mapping whose repr hides the key values, so logging a config doesn't leak them"""
+    
+    def __repr__(self) -> str:
+        return repr({provider: '***' if key else key for provider, key in self.items()})
+
+
+@lru_cache(maxsize=8)
+def _read_config(config_path: str) -> Dict[str, Any]:
+    """Parse a config file; cached so each file is read and parsed only once"""
+    if load_dotenv is not None:
+        # Variables already in the environment win over the .env file
+        load_dotenv(_PROJECT_ROOT / ".env")
+    
+    # Load YAML config; the loader takes bytes and detects the encoding itself
+    with open(config_path, 'rb') as file:
+        config = yaml.load(file, Loader=_YamlLoader)
+    
+    # Make sure every known provider has an API key entry (None when unset);
+    # other keys under api_keys are kept as written. Keys set in the
+    # environment take precedence over the YAML file
+    api_keys = config['api_keys'] = _ApiKeys(config.get('api_keys') or {})
+    for provider in _API_KEY_PROVIDERS:
+        env_key = os.environ.get(f"{provider.upper()}_API_KEY")
+        if env_key:
+            api_keys[provider] = env_key
+        else:
+            api_keys.setdefault(provider, None)
+    
+    return config
+
 
 def load_config(config_path: str = None) -> Dict[str, Any]:
     """
     Load configuration from YAML file
     
+    The parsed file is cached per path; every caller gets its own copy, so
+    components may modify their config freely. Call reload_config() (or
+    load_config.cache_clear()) to pick up edits to the file within the same process.
+    
     Args:
         config_path: Path to config file. If None, uses default config/config.yaml
         
@@ -18,29 +79,36 @@ def load_config(config_path: str = None) -> Dict[str, Any]:
         Dictionary containing configuration settings
     """
     if config_path is None:
-        config_path = Path(__file__).parent.parent.parent / "config" / "config.yaml"
-    
-    # Load YAML config
-    with open(config_path, 'r', encoding='utf-8') as file:
-        config = yaml.safe_load(file)
+        # Already resolved; the common case builds no Path objects
+        resolved = _DEFAULT_CONFIG_STR
+    else:
+        resolved = str(Path(config_path).resolve())
     
-    # Extract API keys from the YAML file
-    config['api_keys'] = {
-        'openai': config.get('api_keys', {}).get('openai'),
-        'anthropic': config.get('api_keys', {}).get('anthropic'),
-        'elevenlabs': config.get('api_keys', {}).get('elevenlabs'),
-        'google': config.get('api_keys', {}).get('google'),  # Read Gemini API key
-        'google_tts': config.get('api_keys', {}).get('google_tts')
-    }
+    return copy.deepcopy(_read_config(resolved))
+
+
+load_config.cache_clear = _read_config.cache_clear
+
+
+def reload_config(config_path: str = None) -> Dict[str, Any]:
+    """
+    Drop every cached config file and load the config again from disk
     
-    return config
+    Args:
+        config_path: Path to config file. If None, uses default config/config.yaml
+        
+    Returns:
+        Dictionary containing configuration settings
+    """
+    _read_config.cache_clear()
+    return load_config(config_path)
 
 
 def get_data_dir() -> Path:
     """Get the data directory path"""
-    return Path(__file__).parent.parent.parent / "data"
+    return _DATA_DIR
 
 
 def get_output_dir() -> Path:
     """Get the output directory path"""
-    return Path(__file__).parent.parent.parent / "outputs"
\ No newline at end of file
+    return _OUTPUT_DIR
@@ -4,43 +4,102 @@ Logging configuration for the podcast pipeline
 
 import logging
 import sys
+import threading
+from functools import lru_cache
 from pathlib import Path
-from loguru import logger
 
+# Console format with color markup, and the same layout without it
+_COLOR_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+_PLAIN_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} - {message}"
 
-def setup_logger(level: str = "INFO", log_file: str = None) -> None:
+# loguru's logger, imported on first use so importing this module stays cheap
+_logger = None
+
+# (level, log_file, json_file) of the current setup_logger configuration, and the ids of
+# the sinks it added; the lock keeps concurrent setup calls from interleaving
+_configured_with = None
+_sink_ids = []
+_setup_lock = threading.Lock()
+
+
+def _get_loguru_logger():
+    """Import loguru once and return its logger"""
+    global _logger
+    if _logger is None:
+        from loguru import logger
+        _logger = logger
+    return _logger
+
+
+def setup_logger(
+    level: str = "INFO", 
+    log_file: str = None, 
+    json_file: bool = True, 
+    force: bool = False
+) -> None:
     """
     Setup logging configuration using loguru
     
+    Calling it again with the same settings keeps the current sinks. Different
+    settings (or force=True) replace only the sinks added here, so sinks added
+    elsewhere (e.g. in a notebook) survive a reconfiguration.
+    
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR)
         log_file: Path to log file. If None, only logs to console
+        json_file: Write the log file as one JSON record per line (compresses
+            well and parses without regexes); False writes plain text lines
+        force: Reconfigure even if already set up with the same settings
     """
-    # Remove default logger
-    logger.remove()
-    
-    # Add console logger
-    logger.add(
-        sys.stderr,
-        level=level,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        colorize=True
-    )
-    
-    # Add file logger if specified
-    if log_file:
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+    global _configured_with
+    with _setup_lock:
+        settings = (level, log_file, json_file)
+        if _configured_with == settings and not force:
+            # Already set up this way; keep the existing sinks
+            return
+        
+        logger = _get_loguru_logger()
         
-        logger.add(
-            log_file,
+        if _configured_with is None:
+            # Remove default logger
+            logger.remove()
+        else:
+            for sink_id in _sink_ids:
+                logger.remove(sink_id)
+        _sink_ids.clear()
+        
+        # Add console logger; colors only when a terminal will show them, so
+        # redirected output skips the markup handling altogether
+        colorize = sys.stderr.isatty()
+        _sink_ids.append(logger.add(
+            sys.stderr,
             level=level,
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} - {message}",
-            rotation="10 MB",
-            retention="1 month"
-        )
+            format=_COLOR_FORMAT if colorize else _PLAIN_FORMAT,
+            colorize=colorize
+        ))
+        
+        # Add file logger if specified
+        if log_file:
+            log_path = Path(log_file)
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            _sink_ids.append(logger.add(
+                log_file,
+                level=level,
+                format=_PLAIN_FORMAT,
+                rotation="10 MB",
+                retention="1 month",
+                compression="gz",
+                serialize=json_file,
+                # Writes, rotation and compression run on loguru's worker thread,
+                # so a rotation never stalls the code that is logging
+                enqueue=True
+            ))
+        
+        _configured_with = settings
 
 
+@lru_cache(maxsize=None)
 def get_logger(name: str):
-    """Get a logger instance for a specific module"""
-    return logger.bind(name=name)
+    """Get a logger instance for a specific module (one shared instance per name)"""
+    return _get_loguru_logger().bind(name=name)